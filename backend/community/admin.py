@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Post, Comment, Like, KarmaTransaction
+from .models import (
+    Post, Comment, Like, KarmaTransaction, KarmaBucket, KarmaDailySummary, UserKarma,
+    Follow, FollowerCount,
+)
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -18,3 +21,23 @@ class LikeAdmin(admin.ModelAdmin):
 @admin.register(KarmaTransaction)
 class KarmaTransactionAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "points", "created_at")
+
+@admin.register(KarmaBucket)
+class KarmaBucketAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "hour", "points", "post_karma", "comment_karma")
+
+@admin.register(KarmaDailySummary)
+class KarmaDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "day", "points", "transactions")
+
+@admin.register(UserKarma)
+class UserKarmaAdmin(admin.ModelAdmin):
+    list_display = ("user", "karma_24h", "lifetime", "window_start")
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ("id", "follower", "followee", "created_at")
+
+@admin.register(FollowerCount)
+class FollowerCountAdmin(admin.ModelAdmin):
+    list_display = ("user", "count")
@@ -0,0 +1,118 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of token key -> (user, token), each entry valid for
+    AUTH_TOKEN_CACHE_TTL seconds and at most AUTH_TOKEN_CACHE_SIZE kept.
+
+    It is per process: signals evict entries in the process that made the
+    change, and the TTL bounds how long other processes (or queryset
+    ``update()`` calls, which send no signals) can serve a stale entry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + settings.AUTH_TOKEN_CACHE_TTL, value
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            stale = [
+                key for key, (_, (user, _)) in self._entries.items()
+                if user.pk == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token/User query for keys it has
+    seen recently. Deleting a token or saving its user (e.g. deactivating
+    them) evicts the entry; see community.signals.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            # Raises AuthenticationFailed for unknown keys and inactive users
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        # Requests get their own copy, so nothing one view sets on
+        # request.user leaks into another request
+        return copy.copy(user), token
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` for plain async views, which DRF does not run:
+        ``(user, token)``, None without token credentials, or
+        AuthenticationFailed. A cache miss is one async ORM query.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        try:
+            key = auth[1].decode() if len(auth) == 2 else None
+        except UnicodeError:
+            key = None
+        if key is None:
+            # Malformed header: DRF raises the matching error, before any query
+            return self.authenticate(request)
+
+        cached = token_cache.get(key)
+        if cached is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related("user").aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if not token.user.is_active:
+                raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+            cached = (token.user, token)
+            token_cache.set(key, cached)
+        user, token = cached
+        return copy.copy(user), token
@@ -0,0 +1,164 @@
+"""
+Per-route load generation against a seeded community (see seed.py).
+
+``route_request`` turns each route in community/urls.py into a concrete
+request against the dataset; ``run_benchmark`` replays them through the
+full middleware stack and reports latency percentiles, queries per request
+and peak Python memory per route. QueryBudgetTest replays the same
+requests, so the benchmark and the budgets exercise identical work.
+"""
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .models import Comment, Post
+from .seed import SEED_PASSWORD, USERNAME_PREFIX
+from .urls import urlpatterns
+
+ROUTES = [str(pattern.pattern) for pattern in urlpatterns]
+
+
+class Targets:
+    """The benchmark user and the rows its requests point at."""
+
+    def __init__(self, rotate=100):
+        self.user = User.objects.filter(
+            username__startswith=USERNAME_PREFIX
+        ).order_by("id").first()
+        if self.user is None:
+            raise LookupError("No seeded users; run the seed command first")
+        self.token, _ = Token.objects.get_or_create(user=self.user)
+        # Someone the user does not follow yet, for follow then unfollow
+        self.followee = (
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+            .exclude(id=self.user.id)
+            .exclude(followers__follower=self.user)
+            .order_by("id").first()
+        )
+        # Heaviest thread for reads, unliked rows to like and unlike
+        self.post = Post.objects.order_by("-comment_count", "id").first()
+        self.comment = Comment.objects.order_by("-reply_count", "id").first()
+        self.like_posts = list(
+            Post.objects.exclude(post_likes__user=self.user)
+            .order_by("id").values_list("id", flat=True)[:rotate]
+        )
+        self.like_comments = list(
+            Comment.objects.exclude(comment_likes__user=self.user)
+            .order_by("id").values_list("id", flat=True)[:rotate]
+        )
+        self.batch_posts = list(
+            Post.objects.order_by("id").values_list("id", flat=True)[:25]
+        )
+
+    def client(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        return client
+
+
+def route_request(route, targets, i=0):
+    """
+    ``(method, path, data)`` for ``route`` in iteration ``i``. Like and
+    unlike routes move to a fresh target each iteration and the unlike
+    undoes the like, so both do real work when replayed in ROUTES order.
+    """
+    post_id = targets.post.id
+    comment_id = targets.comment.id
+    if route.endswith("/like/") or route.endswith("/unlike/"):
+        post_id = targets.like_posts[i % len(targets.like_posts)]
+        comment_id = targets.like_comments[i % len(targets.like_comments)]
+    path = "/api/" + route.replace("<int:post_id>", str(post_id)).replace(
+        "<int:comment_id>", str(comment_id)
+    ).replace("<int:user_id>", str(targets.followee.id))
+
+    if route == "auth/register/":
+        username = f"bench-{time.time_ns()}-{i}"
+        return "post", path, {"username": username, "password": "p"}
+    if route == "auth/login/":
+        return "post", path, {"username": targets.user.username, "password": SEED_PASSWORD}
+    if route in ("posts/create/", "posts/<int:post_id>/comments/"):
+        return "post", path, {"content": "benchmark", "parent_id": None}
+    if route == "likes/batch/":
+        # Like then unlike every post: the batch nets out and stays repeatable
+        return "post", path, {"operations": [
+            {"op": op, "type": "post", "id": batch_post}
+            for batch_post in targets.batch_posts
+            for op in ("like", "unlike")
+        ]}
+    if route == "events/":
+        # Opens the stream only; the benchmark does not read from it
+        return "get", path, {"posts": str(post_id)}
+    if route == "search/":
+        return "get", path, {"q": "seed comment"}
+    if route.endswith("like/") or route.endswith("follow/"):
+        return "post", path, None
+    return "get", path, None
+
+
+def _percentile(values, percentile):
+    if len(values) < 2:
+        return round(values[0], 2) if values else None
+    return round(statistics.quantiles(values, n=100)[percentile - 1], 2)
+
+
+def run_benchmark(routes=None, iterations=50, cold=False):
+    """
+    ``{route: stats}`` after ``iterations`` rounds over ``routes``.
+
+    With ``cold`` the cache is cleared before every request, so reads pay
+    for serialization each time; otherwise repeated reads are cache hits.
+    Peak memory comes from one extra traced round, since tracing slows
+    every allocation down.
+    """
+    routes = routes or ROUTES
+    targets = Targets(rotate=iterations)
+    client = targets.client()
+    samples = {route: {"ms": [], "queries": [], "statuses": {}} for route in routes}
+
+    def send(route, i):
+        method, path, data = route_request(route, targets, i)
+        if cold:
+            cache.clear()
+        return getattr(client, method)(path, data, format="json")
+
+    for i in range(iterations):
+        for route in routes:
+            sample = samples[route]
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = send(route, i)
+                sample["ms"].append((time.perf_counter() - started) * 1000)
+            sample["queries"].append(len(queries))
+            status = str(response.status_code)
+            sample["statuses"][status] = sample["statuses"].get(status, 0) + 1
+
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for route in routes:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            send(route, iterations)
+            peaks[route] = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    report = {}
+    for route, sample in samples.items():
+        report[route] = {
+            "requests": len(sample["ms"]),
+            "statuses": sample["statuses"],
+            "p50_ms": _percentile(sample["ms"], 50),
+            "p99_ms": _percentile(sample["ms"], 99),
+            "mean_queries": round(statistics.mean(sample["queries"]), 2),
+            "max_queries": max(sample["queries"]),
+            "peak_kib": round(peaks[route] / 1024, 1),
+        }
+    return report
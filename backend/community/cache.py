@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+
+LEADERBOARD_KEY = "community:leaderboard"
+
+
+def _payload_key(post_id, version, view):
+    return f"community:post:{post_id}:v{version}:{view}"
+
+
+def load_post_payloads(versions, view, build):
+    """
+    Viewer-independent serialized posts for ``versions`` (``{post_id:
+    version}``, in display order).
+
+    Payloads are cached per post, keyed by post id, ``Post.version`` and
+    ``view`` (representation name). Every comment/like write bumps the
+    version, which retires exactly that post's entries; they then age out
+    with FEED_CACHE_TIMEOUT. ``build(missing_ids)`` must return
+    ``{post_id: payload}`` for cache misses; ids it omits are skipped.
+    Versions are read before ``build`` touches the database, so a payload
+    is never older than the version it is stored under.
+    """
+    keys = {
+        post_id: _payload_key(post_id, version, view)
+        for post_id, version in versions.items()
+    }
+    hits = cache.get_many(keys.values())
+    payloads = {
+        post_id: hits[key] for post_id, key in keys.items() if key in hits
+    }
+
+    missing = [post_id for post_id in keys if post_id not in payloads]
+    if missing:
+        built = build(missing)
+        cache.set_many(
+            {keys[post_id]: payload for post_id, payload in built.items()},
+            timeout=settings.FEED_CACHE_TIMEOUT,
+        )
+        payloads.update(built)
+
+    return [payloads[post_id] for post_id in keys if post_id in payloads]
+
+
+def cached_leaderboard(build):
+    """Leaderboard rows, recomputed at most once per LEADERBOARD_CACHE_TIMEOUT."""
+    return cache.get_or_set(
+        LEADERBOARD_KEY, build, timeout=settings.LEADERBOARD_CACHE_TIMEOUT
+    )
+
+
+async def acached_leaderboard(build):
+    """``cached_leaderboard`` for async views; ``build`` is a coroutine function."""
+    rows = await cache.aget(LEADERBOARD_KEY)
+    if rows is None:
+        rows = await build()
+        await cache.aset(
+            LEADERBOARD_KEY, rows, timeout=settings.LEADERBOARD_CACHE_TIMEOUT
+        )
+    return rows
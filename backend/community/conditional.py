@@ -0,0 +1,33 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, *parts):
+    """
+    Strong ETag over ``parts`` and the caller's credentials.
+
+    ``is_liked`` differs per viewer, so the Authorization header is part of
+    the tag; the viewer's own likes bump ``Post.version`` like any other.
+    """
+    raw = "|".join(str(part) for part in parts)
+    raw += "|" + request.META.get("HTTP_AUTHORIZATION", "")
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the request's validators still match, else None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ["Authorization"])
+    return response
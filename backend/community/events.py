@@ -0,0 +1,168 @@
+"""
+Live feed events for the Server-Sent Events endpoint.
+
+Write views publish small events once their transaction commits:
+
+    channel "feed"        {"type": "post.created", "post_id": ...}
+    channel "post:<id>"   {"type": "comment.created", ...}
+                          {"type": "post.likes", "post_id": ..., "like_count": ...}
+                          {"type": "comment.likes", "comment_id": ..., ...}
+
+and ``events_stream`` subscribes each connected client to the channels it
+asked for. The broker is pluggable through EVENTS_BACKEND; it must provide
+
+    publish(channel, event)    thread-safe, called from sync write views
+    has_subscribers(channel)   lets writers skip building unwanted events
+    subscribe(channels)        an object with ``async get()`` and ``close()``
+
+``LocalBroker`` keeps everything in this process, so a client only sees
+writes handled by the same worker; with several workers, plug in a broker
+backed by a shared channel (e.g. Redis pub/sub) instead.
+"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+
+FEED_CHANNEL = "feed"
+
+
+def post_channel(post_id):
+    return f"post:{post_id}"
+
+
+class Subscription:
+    """One client's queue of events, drained on its event loop."""
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = channels
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event):
+        # Any thread; the queue is only touched on the subscriber's loop
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop is gone without the stream having closed us
+            self.close()
+
+    def _put(self, event):
+        if self._queue.full():
+            # Too slow to keep up: drop the backlog and have it refetch
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            event = {"id": event["id"], "type": "resync"}
+        self._queue.put_nowait(event)
+
+    async def get(self):
+        return await self._queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process pub/sub: one set of subscriptions per channel."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+        self._ids = itertools.count(1)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            for channel in channels:
+                self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def has_subscribers(self, channel):
+        return channel in self._channels
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+            event = {"id": next(self._ids), **event}
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._channels.values()))
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker of class EVENTS_BACKEND."""
+    path = settings.EVENTS_BACKEND
+    with _brokers_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def publish_on_commit(channel, event):
+    """Publish ``event`` once the current transaction commits."""
+    transaction.on_commit(partial(get_broker().publish, channel, event))
+
+
+def _publish_like_counts(post_ids, comment_posts):
+    broker = get_broker()
+    # Counts are read only for posts someone is watching
+    post_ids = [pk for pk in post_ids if broker.has_subscribers(post_channel(pk))]
+    comment_posts = {
+        pk: post_id for pk, post_id in comment_posts.items()
+        if broker.has_subscribers(post_channel(post_id))
+    }
+    if post_ids:
+        for pk, like_count in Post.objects.filter(pk__in=post_ids).values_list(
+            "id", "like_count"
+        ):
+            broker.publish(post_channel(pk), {
+                "type": "post.likes", "post_id": pk, "like_count": like_count,
+            })
+    if comment_posts:
+        for pk, like_count in Comment.objects.filter(pk__in=comment_posts).values_list(
+            "id", "like_count"
+        ):
+            post_id = comment_posts[pk]
+            broker.publish(post_channel(post_id), {
+                "type": "comment.likes",
+                "post_id": post_id,
+                "comment_id": pk,
+                "like_count": like_count,
+            })
+
+
+def publish_like_counts_on_commit(post_ids=(), comment_posts=None):
+    """
+    After commit, send the current like counts of ``post_ids`` and of the
+    comments in ``comment_posts`` (``{comment_id: post_id}``) to the
+    channels of their posts.
+    """
+    transaction.on_commit(
+        partial(_publish_like_counts, list(post_ids), dict(comment_posts or {}))
+    )
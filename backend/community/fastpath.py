@@ -0,0 +1,123 @@
+"""
+Plain-dict serialization for the read-only post shapes.
+
+Produces exactly what PostSerializer / PostSummarySerializer render (same
+keys, order and formatting) from ``.values()`` rows, skipping DRF's
+per-field machinery. Payloads are viewer-independent: ``is_liked`` is
+always False and gets merged in by ViewerState.
+"""
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+
+from .models import Comment, Post
+from .tree import comments_for_trees
+
+# DRF's own field, so datetimes format exactly as the serializers do
+_datetime = serializers.DateTimeField()
+
+POST_FIELDS = (
+    "id",
+    "author_id",
+    "author__username",
+    "content",
+    "created_at",
+    "comment_count",
+    "like_count",
+    "reply_count",
+)
+COMMENT_FIELDS = (
+    "id",
+    "post_id",
+    "parent_id",
+    "author_id",
+    "author__username",
+    "content",
+    "created_at",
+    "like_count",
+    "reply_count",
+)
+
+
+def comment_payload(row, preview=False):
+    data = {
+        "id": row["id"],
+        "author": {"id": row["author_id"], "username": row["author__username"]},
+        "content": row["content"],
+        "created_at": _datetime.to_representation(row["created_at"]),
+        "like_count": row["like_count"],
+        "is_liked": False,
+        "reply_count": row["reply_count"],
+    }
+    if not preview:
+        data["has_more"] = False
+        data["children"] = []
+    return data
+
+
+def _comment_rows(post_ids, view, summary_comments, max_depth, max_children):
+    if view != "summary":
+        return comments_for_trees(
+            post_ids,
+            max_depth,
+            max_children,
+            select=lambda qs: qs.values(*COMMENT_FIELDS, "path"),
+        )
+    return (
+        Comment.objects
+        .filter(post_id__in=post_ids, parent__isnull=True)
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F("post_id")],
+                order_by=[F("id").asc()],
+            ),
+        )
+        .filter(position__lte=summary_comments)
+        .order_by("id")
+        .values(*COMMENT_FIELDS)
+    )
+
+
+def post_payloads(
+    post_ids, view, summary_comments=0, max_depth=None, max_children=None
+):
+    """
+    ``{post_id: payload}`` for ``view`` ("full" or "summary"): two queries,
+    plus one per level when ``max_depth``/``max_children`` limit the trees.
+    """
+    payloads = {}
+    for row in Post.objects.filter(id__in=post_ids).values(*POST_FIELDS):
+        payloads[row["id"]] = {
+            "id": row["id"],
+            "author": {"id": row["author_id"], "username": row["author__username"]},
+            "content": row["content"],
+            "created_at": _datetime.to_representation(row["created_at"]),
+            "comment_count": row["comment_count"],
+            "like_count": row["like_count"],
+            "is_liked": False,
+            "reply_count": row["reply_count"],
+            "has_more": False,
+            "comments": [],
+        }
+
+    if payloads and not (view == "summary" and summary_comments <= 0):
+        preview = view == "summary"
+        comments = {}
+        rows = _comment_rows(
+            list(payloads), view, summary_comments, max_depth, max_children
+        )
+        for row in rows:
+            comment = comments[row["id"]] = comment_payload(row, preview)
+            if row["parent_id"] is None:
+                payloads[row["post_id"]]["comments"].append(comment)
+            else:
+                comments[row["parent_id"]]["children"].append(comment)
+
+        if not preview:
+            for comment in comments.values():
+                comment["has_more"] = comment["reply_count"] > len(comment["children"])
+
+    for post in payloads.values():
+        post["has_more"] = post["reply_count"] > len(post["comments"])
+    return payloads
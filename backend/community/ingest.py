@@ -0,0 +1,222 @@
+"""
+Write-behind like ingestion (LIKE_INGEST_MODE = "buffered").
+
+Like requests enqueue a ``LikeEvent`` and return at once; a background
+thread drains the queue every LIKE_FLUSH_INTERVAL seconds (or as soon as
+LIKE_FLUSH_BATCH events are waiting) and writes the batch with
+``apply_likes``. Bursts then cost one short write transaction per flush
+instead of one per like, which is what keeps SQLite's single write lock
+from timing out.
+
+"Already liked" still holds per user: the view rejects a like that is in
+the database *or* still pending here. An event leaves the pending set
+only after its flush has committed, so one of the two checks always sees
+it. Each process has its own buffer; a like sent to two processes at the
+same moment is deduplicated by the unique constraints.
+
+With LIKE_SPOOL_PATH set, events are also appended to a spool file
+before the request returns: one per process, the path plus the pid, so
+workers never truncate or rotate each other's files. On startup a
+process takes over, under a lock, the spools of processes that have
+exited and replays them, so a crash loses nothing that was acknowledged.
+Replaying an already-flushed event is harmless because ``apply_likes``
+skips likes that exist.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .likes import LikeEvent, apply_likes
+
+logger = logging.getLogger(__name__)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class LikeBuffer:
+    def __init__(self, flush_interval=0.5, batch_size=500, spool_path=None,
+                 worker=None):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.spool_path = spool_path
+        # Names this process's spool file; the pid unless a test says otherwise
+        self.worker = os.getpid() if worker is None else worker
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._queue = []
+        self._pending = set()
+        self._thread = None
+        if spool_path:
+            self._replay()
+
+    # -- producers ---------------------------------------------------------
+
+    def submit(self, event):
+        """Queue ``event``; False if the same like is already pending."""
+        with self._lock:
+            if event in self._pending:
+                return False
+            self._pending.add(event)
+            self._queue.append(event)
+            if self.spool_path:
+                self._spool([event])
+            full = len(self._queue) >= self.batch_size
+        if full:
+            self._wake.set()
+        return True
+
+    def is_pending(self, event):
+        with self._lock:
+            return event in self._pending
+
+    def __len__(self):
+        with self._lock:
+            return len(self._queue)
+
+    # -- consumer ----------------------------------------------------------
+
+    def flush(self):
+        """Write every queued event; returns the number that were new likes."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._queue = self._queue, []
+                if self.spool_path and batch:
+                    # New events go to a fresh spool while this batch is written
+                    os.replace(self._spool_file, self._flushing_path)
+            if not batch:
+                return 0
+            try:
+                applied = apply_likes(batch)
+            except Exception:
+                with self._lock:
+                    self._queue[:0] = batch
+                    if self.spool_path:
+                        self._spool(batch)
+                        os.remove(self._flushing_path)
+                raise
+            with self._lock:
+                self._pending.difference_update(batch)
+            if self.spool_path:
+                os.remove(self._flushing_path)
+            return len(applied)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="like-ingest", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Like flush failed; retrying next interval")
+        close_old_connections()
+
+    # -- spool -------------------------------------------------------------
+
+    @property
+    def _spool_file(self):
+        return f"{self.spool_path}.{self.worker}"
+
+    @property
+    def _flushing_path(self):
+        return self._spool_file + ".flushing"
+
+    def _spool(self, events, path=None, mode="a"):
+        with open(path or self._spool_file, mode) as spool:
+            for event in events:
+                spool.write(json.dumps(event) + "\n")
+            spool.flush()
+            os.fsync(spool.fileno())
+
+    def _orphaned_spools(self):
+        """
+        Spool files no live process owns: those of exited pids, our own pid's
+        (left by an earlier process that had it) and the single shared spool
+        of earlier releases. ".flushing" files, stopped mid-flush, go first.
+        """
+        orphaned = []
+        for path in glob.glob(glob.escape(self.spool_path) + "*"):
+            suffix = path[len(self.spool_path):]
+            flushing = suffix.endswith(".flushing")
+            owner = suffix.removesuffix(".flushing")
+            if owner:
+                if not owner.startswith(".") or not owner[1:].isdigit():
+                    continue
+                pid = int(owner[1:])
+                if pid != self.worker and _process_alive(pid):
+                    continue
+            orphaned.append((not flushing, path))
+        return [path for _, path in sorted(orphaned)]
+
+    def _replay(self):
+        with open(self.spool_path + ".lock", "a") as lock:
+            # Two workers starting together must not both adopt a spool
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            paths = self._orphaned_spools()
+            events = []
+            for path in paths:
+                with open(path) as spool:
+                    events.extend(
+                        LikeEvent(*json.loads(line)) for line in spool if line.strip()
+                    )
+            events = list(dict.fromkeys(events))
+            # Durable in our own spool before the adopted files go
+            self._spool(events, self._spool_file + ".tmp", "w")
+            os.replace(self._spool_file + ".tmp", self._spool_file)
+            for path in paths:
+                if path != self._spool_file:
+                    os.remove(path)
+        with self._lock:
+            self._pending.update(events)
+            self._queue.extend(events)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_like_buffer():
+    """The process-wide buffer, started on first use."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = LikeBuffer(
+                flush_interval=settings.LIKE_FLUSH_INTERVAL,
+                batch_size=settings.LIKE_FLUSH_BATCH,
+                spool_path=settings.LIKE_SPOOL_PATH,
+            ).start()
+        return _buffer
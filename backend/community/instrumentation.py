@@ -0,0 +1,155 @@
+"""
+Per-request cost accounting.
+
+RequestMetricsMiddleware counts every SQL query (on every database alias,
+in whichever thread the ORM runs it) and times it, and times the phases
+code marks with ``timed(name)``:
+"serialize" around payload building, "render" for the JSON renderer. The
+totals go out as a ``Server-Timing`` header, which browser dev tools chart,
+and as one JSON log line on the ``community.requests`` logger. That line is
+logged as a warning when the request ran more than QUERY_BUDGET_WARN
+queries.
+
+Streamed responses are measured up to the first byte only.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger("community.requests")
+
+_current = ContextVar("community_request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.timings = {"db": 0.0}
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add("db", time.perf_counter() - started)
+
+    def server_timing(self):
+        entries = []
+        for name, seconds in self.timings.items():
+            entry = f"{name};dur={seconds * 1000:.2f}"
+            if name == "db":
+                entry += f';desc="{self.queries} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+    def as_log(self, request, response):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": self.queries,
+        }
+        for name, seconds in self.timings.items():
+            record[f"{name}_ms"] = round(seconds * 1000, 2)
+        return record
+
+
+def current_metrics():
+    """Metrics of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    # Installed on every connection (community.signals); the ContextVar is
+    # copied into the threads async views run their queries in
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def instrument_connection(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(name):
+    """Add the block's (or decorated function's) wall time to ``name``."""
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.add(name, time.perf_counter() - started)
+
+
+@sync_and_async_middleware
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Hooks are called as they are found; a sync one would take a thread
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, metrics, started)
+
+    def _report(self, request, response, metrics, started):
+        metrics.add("total", time.perf_counter() - started)
+
+        response["Server-Timing"] = metrics.server_timing()
+        level = (
+            logging.WARNING
+            if metrics.queries > settings.QUERY_BUDGET_WARN
+            else logging.INFO
+        )
+        logger.log(level, json.dumps(metrics.as_log(request, response)))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render right after this hook; time until they are done
+        metrics = _current.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            metrics.add("render", time.perf_counter() - started)
+
+        if metrics is not None:
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        return self.process_template_response(request, response)
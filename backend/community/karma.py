@@ -0,0 +1,394 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, IntegerField, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from .models import (
+    KarmaBucket,
+    KarmaDailySummary,
+    KarmaTransaction,
+    UserKarma,
+    pk_case,
+)
+
+POST_LIKE_POINTS = 5
+COMMENT_LIKE_POINTS = 1
+
+LEADERBOARD_WINDOW = timedelta(hours=24)
+LEADERBOARD_ORDERING = ("-karma_24h", "user_id")
+# UserKarma columns ranks can be read from, each in leaderboard order
+KARMA_ORDERINGS = {
+    "24h": LEADERBOARD_ORDERING,
+    "lifetime": ("-lifetime", "user_id"),
+}
+
+
+def hour_bucket(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def booked_hour():
+    """The KarmaBucket hour of a KarmaTransaction row, as an expression."""
+    return Coalesce("bucket_hour", TruncHour("created_at"))
+
+
+def karma_window_start(now=None):
+    """First hourly bucket inside the 24h window ending at ``now``."""
+    return hour_bucket((now or timezone.now()) - LEADERBOARD_WINDOW)
+
+
+def _bucket_deltas(points):
+    # Unlikes are recorded as the negated award
+    return {
+        "points": points,
+        "post_karma": points if abs(points) == POST_LIKE_POINTS else 0,
+        "comment_karma": points if abs(points) == COMMENT_LIKE_POINTS else 0,
+    }
+
+
+def add_to_bucket(user_id, hour, deltas):
+    _add_to_rollup_row(KarmaBucket, "hour", user_id, hour, deltas)
+
+
+def _add_to_rollup_row(model, period, user_id, value, deltas):
+    # Add ``deltas`` to the ``model`` row of (user_id, period=value)
+    key = {"user_id": user_id, period: value}
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**key).update(**updates)
+
+
+def _user_karma_deltas(points):
+    deltas = _bucket_deltas(points)
+    return {
+        "lifetime": points,
+        "karma_24h": points,
+        "post_karma_24h": deltas["post_karma"],
+        "comment_karma_24h": deltas["comment_karma"],
+    }
+
+
+def _add_to_user_karma_row(user_id, deltas):
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+    if UserKarma.objects.filter(user_id=user_id).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            UserKarma.objects.create(
+                user_id=user_id, window_start=karma_window_start(), **deltas
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        UserKarma.objects.filter(user_id=user_id).update(**updates)
+
+
+def add_to_user_karma(totals):
+    """
+    Add ``{(user_id, hour): deltas}`` to the users' UserKarma totals: one
+    lookup, one CASE update and one insert for users getting their first
+    karma. Deltas booked to an hour before a row's ``window_start`` only
+    count towards lifetime; the 24h totals no longer include that hour.
+    """
+    window_starts = dict(
+        UserKarma.objects
+        .filter(user_id__in={user_id for user_id, _ in totals})
+        .values_list("user_id", "window_start")
+    )
+    window_start = karma_window_start()
+    users = {}
+    for (user_id, hour), deltas in totals.items():
+        in_window = hour >= window_starts.get(user_id, window_start)
+        row = users.setdefault(user_id, dict.fromkeys(deltas, 0))
+        for name, value in deltas.items():
+            if in_window or name == "lifetime":
+                row[name] += value
+
+    fields = next(iter(users.values()), {})
+    if window_starts:
+        UserKarma.objects.filter(user_id__in=window_starts).update(**{
+            name: F(name) + pk_case(
+                {user_id: users[user_id][name] for user_id in window_starts}
+            )
+            for name in fields
+        })
+
+    missing = [user_id for user_id in users if user_id not in window_starts]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            UserKarma.objects.bulk_create(
+                UserKarma(user_id=user_id, window_start=window_start, **users[user_id])
+                for user_id in missing
+            )
+    except IntegrityError:
+        for user_id in missing:
+            _add_to_user_karma_row(user_id, users[user_id])
+
+
+def award_karma(user, points):
+    """
+    Append ``points`` for ``user`` to the ledger and fold them into the
+    user's hourly KarmaBucket and UserKarma totals. Call inside the writer's
+    transaction so the ledger row and the rollups commit together.
+    """
+    txn = KarmaTransaction.objects.create(user=user, points=points)
+    add_to_bucket(user.id, hour_bucket(txn.created_at), _bucket_deltas(points))
+    _add_to_user_karma_row(user.id, _user_karma_deltas(points))
+    return txn
+
+
+def add_to_buckets(totals):
+    """
+    ``add_to_bucket`` for many ``{(user_id, hour): deltas}``: one lookup,
+    one CASE update for the buckets that exist and one insert for the rest.
+    """
+    add_to_rollup(KarmaBucket, "hour", totals)
+
+
+def add_to_rollup(model, period, totals):
+    """
+    Add ``{(user_id, period value): deltas}`` to the per-user rollup
+    ``model``, unique on (user, ``period``): KarmaBucket by hour or
+    KarmaDailySummary by day.
+    """
+    existing = {
+        (user_id, value): pk
+        for pk, user_id, value in model.objects
+        .filter(**{
+            "user_id__in": {user_id for user_id, _ in totals},
+            f"{period}__in": {value for _, value in totals},
+        })
+        .values_list("id", "user_id", period)
+        if (user_id, value) in totals
+    }
+    fields = next(iter(totals.values()), {})
+    if existing:
+        model.objects.filter(pk__in=existing.values()).update(**{
+            name: F(name) + pk_case(
+                {pk: totals[key][name] for key, pk in existing.items()}
+            )
+            for name in fields
+        })
+
+    missing = [key for key in totals if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(
+                model(user_id=user_id, **{period: value}, **totals[(user_id, value)])
+                for user_id, value in missing
+            )
+    except IntegrityError:
+        # Another writer created some of them first
+        for user_id, value in missing:
+            _add_to_rollup_row(model, period, user_id, value, totals[(user_id, value)])
+
+
+def award_karma_bulk(awards, hours=None):
+    """
+    ``award_karma`` for many ``(user_id, points)`` pairs: one ledger insert
+    and set-based bucket and UserKarma upserts, however many users are
+    involved. ``hours``, parallel to ``awards``, books each one into the
+    given hourly bucket instead of the current one, so taking back an
+    earlier award leaves the buckets as if it had never been made.
+    """
+    if not awards:
+        return
+    txns = KarmaTransaction.objects.bulk_create(
+        KarmaTransaction(
+            user_id=user_id,
+            points=points,
+            bucket_hour=hours[i] if hours is not None else None,
+        )
+        for i, (user_id, points) in enumerate(awards)
+    )
+
+    buckets = {}
+    users = {}
+    for txn in txns:
+        key = (txn.user_id, txn.bucket_hour or hour_bucket(txn.created_at))
+        deltas = buckets.setdefault(key, dict.fromkeys(_bucket_deltas(0), 0))
+        for name, value in _bucket_deltas(txn.points).items():
+            deltas[name] += value
+        deltas = users.setdefault(key, dict.fromkeys(_user_karma_deltas(0), 0))
+        for name, value in _user_karma_deltas(txn.points).items():
+            deltas[name] += value
+    add_to_buckets(buckets)
+    add_to_user_karma(users)
+
+
+def _expire_window(start, after):
+    # Rows to move to ``start``: users with buckets that have left the window
+    # since ``after`` (the oldest window_start behind it), and the rows at
+    # ``after`` themselves, so the next run's range starts later
+    aged = KarmaBucket.objects.filter(hour__gte=after, hour__lt=start)
+    rows = UserKarma.objects.filter(
+        Q(user_id__in=aged.values("user_id")) | Q(window_start=after),
+        window_start__lt=start,
+    )
+
+    def expired(field):
+        return Coalesce(
+            Subquery(
+                KarmaBucket.objects
+                .filter(
+                    user_id=OuterRef("user_id"),
+                    hour__gte=OuterRef("window_start"),
+                    hour__lt=start,
+                )
+                .values("user_id")
+                .annotate(total=Sum(field))
+                .values("total")
+            ),
+            Value(0),
+            output_field=IntegerField(),
+        )
+
+    updates = {
+        "karma_24h": F("karma_24h") - expired("points"),
+        "post_karma_24h": F("post_karma_24h") - expired("post_karma"),
+        "comment_karma_24h": F("comment_karma_24h") - expired("comment_karma"),
+        "window_start": start,
+    }
+    return rows, updates
+
+
+def expire_karma_window(now=None):
+    """
+    Take the hourly buckets that have left the 24h window off UserKarma's
+    24h totals in one UPDATE; returns the rows moved. Run hourly by the
+    ``expire_karma_window`` command, never by reads: until it runs, every
+    row still totals the buckets from its own window_start on. Old buckets
+    never change, and each row only loses those between its own
+    window_start and the new one, so concurrent or repeated calls cannot
+    subtract a bucket twice.
+    """
+    start = karma_window_start(now)
+    after = (
+        UserKarma.objects
+        .filter(window_start__lt=start)
+        .aggregate(after=Min("window_start"))["after"]
+    )
+    if after is None:
+        return 0
+    rows, updates = _expire_window(start, after)
+    return rows.update(**updates)
+
+
+def rebuild_user_karma(now=None):
+    """
+    Recompute every UserKarma row: lifetime from the ledger and daily
+    summaries, the 24h totals from the window's buckets. Returns the rows
+    written.
+    """
+    start = karma_window_start(now)
+    rows = {
+        user_id: UserKarma(user_id=user_id, lifetime=points, window_start=start)
+        for user_id, points in lifetime_karma().items()
+    }
+    for user_id, points, post_karma, comment_karma in (
+        KarmaBucket.objects
+        .filter(hour__gte=start)
+        .values("user_id")
+        .annotate(
+            total=Sum("points"),
+            post_total=Sum("post_karma"),
+            comment_total=Sum("comment_karma"),
+        )
+        .order_by()
+        .values_list("user_id", "total", "post_total", "comment_total")
+    ):
+        row = rows.setdefault(
+            user_id, UserKarma(user_id=user_id, lifetime=0, window_start=start)
+        )
+        row.karma_24h = points
+        row.post_karma_24h = post_karma
+        row.comment_karma_24h = comment_karma
+
+    with transaction.atomic():
+        UserKarma.objects.all().delete()
+        UserKarma.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def ranked_users():
+    """UserKarma rows with karma in the 24h window, for LEADERBOARD_ORDERING."""
+    return UserKarma.objects.filter(karma_24h__gt=0).select_related("user")
+
+
+def leaderboard_rows(limit=5):
+    """Top users by karma over the last 24h, read off the UserKarma index."""
+    return ranked_users().order_by(*LEADERBOARD_ORDERING)[:limit]
+
+
+def _ahead(field, score, user_id):
+    # Rows ranked before (score, user_id) in KARMA_ORDERINGS order: two
+    # index ranges, higher scores and equal scores with lower ids
+    return (
+        UserKarma.objects.filter(**{f"{field}__gt": score}),
+        UserKarma.objects.filter(**{field: score, "user_id__lt": user_id}),
+    )
+
+
+def karma_rank(karma, window="24h"):
+    """
+    1-based rank of ``karma`` (a UserKarma) by its ``window`` total, ties
+    broken by user id: a count over the index entries ahead of it.
+    """
+    field = KARMA_ORDERINGS[window][0].lstrip("-")
+    higher, tied = _ahead(field, getattr(karma, field), karma.user_id)
+    return higher.count() + tied.count() + 1
+
+
+def karma_neighbours(karma, window="24h", count=2):
+    """
+    ``(above, below)``: up to ``count`` UserKarma rows ranked right before
+    ``karma`` (nearest last) and right after it (nearest first).
+    """
+    field = KARMA_ORDERINGS[window][0].lstrip("-")
+    score = getattr(karma, field)
+    higher, tied = _ahead(field, score, karma.user_id)
+    above = list(tied.select_related("user").order_by("-user_id")[:count])
+    if len(above) < count:
+        above += higher.select_related("user").order_by(field, "-user_id")[
+            :count - len(above)
+        ]
+
+    lower = UserKarma.objects.filter(**{f"{field}__lt": score})
+    tied = UserKarma.objects.filter(**{field: score, "user_id__gt": karma.user_id})
+    below = list(tied.select_related("user").order_by("user_id")[:count])
+    if len(below) < count:
+        below += lower.select_related("user").order_by(f"-{field}", "user_id")[
+            :count - len(below)
+        ]
+    return above[::-1], below
+
+
+def lifetime_karma(user_ids=None):
+    """
+    ``{user_id: points}`` over all time: the ledger rows still kept plus
+    the daily summaries compacted from older ones. Users without karma are
+    left out.
+    """
+    totals = {}
+    for model in (KarmaTransaction, KarmaDailySummary):
+        rows = model.objects.all()
+        if user_ids is not None:
+            rows = rows.filter(user_id__in=user_ids)
+        for user_id, points in (
+            rows.values("user_id").annotate(total=Sum("points"))
+            .order_by().values_list("user_id", "total")
+        ):
+            totals[user_id] = totals.get(user_id, 0) + points
+    return totals
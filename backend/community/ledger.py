@@ -0,0 +1,128 @@
+"""
+KarmaTransaction ledger compaction and archival.
+
+The ledger gets one row per like and unlike. Only its last day feeds
+anything live (and that through KarmaBucket), so ``compact_ledger`` folds
+rows older than a cutoff into per-user KarmaDailySummary rows and deletes
+them. Summed points are carried over unchanged, so ``lifetime_karma`` stays
+exact. Hourly buckets before the cutoff are dropped as well: only the
+last 24 hours of them are still counted in UserKarma.
+
+Optionally each chunk of raw rows is first written to a gzip-compressed
+JSONL or CSV file named after its first and last row ids. The file is
+fsynced and renamed into place before the chunk's DELETE commits, so a row
+is never gone from both the table and the archive. A chunk that is rolled
+back is archived again on the next run.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime, time, timedelta, timezone
+
+from django.db import connection, transaction
+
+from .karma import _bucket_deltas, add_to_rollup, expire_karma_window
+from .models import KarmaBucket, KarmaDailySummary, KarmaTransaction
+
+ARCHIVE_FORMATS = ("jsonl", "csv")
+ARCHIVE_FIELDS = ("id", "user_id", "points", "created_at", "bucket_hour")
+
+
+def ledger_cutoff(retention_days, now):
+    """UTC midnight ``retention_days`` before ``now``: whole days compact."""
+    day = (now - timedelta(days=retention_days)).astimezone(timezone.utc).date()
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _isoformat(row):
+    return {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in row.items()
+    }
+
+
+def write_archive(directory, rows, archive_format="jsonl"):
+    """
+    Write ledger ``rows`` (dicts of ARCHIVE_FIELDS, oldest first) to one
+    gzip file in ``directory`` and return its path once it is on disk.
+    """
+    name = f"karma-ledger-{rows[0]['id']:012d}-{rows[-1]['id']:012d}.{archive_format}.gz"
+    path = os.path.join(directory, name)
+    partial = path + ".partial"
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as compressed:
+            text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+            if archive_format == "csv":
+                writer = csv.writer(text)
+                writer.writerow(ARCHIVE_FIELDS)
+                writer.writerows(
+                    [_isoformat(row)[name] for name in ARCHIVE_FIELDS] for row in rows
+                )
+            else:
+                for row in rows:
+                    text.write(json.dumps(_isoformat(row)) + "\n")
+            text.flush()
+            # Leave closing the gzip stream to the outer block
+            text.detach()
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+    return path
+
+
+def _daily_totals(rows):
+    totals = {}
+    for row in rows:
+        booked = row["bucket_hour"] or row["created_at"]
+        key = (row["user_id"], booked.astimezone(timezone.utc).date())
+        deltas = totals.get(key)
+        if deltas is None:
+            deltas = totals[key] = {**dict.fromkeys(_bucket_deltas(0), 0), "transactions": 0}
+        for name, value in _bucket_deltas(row["points"]).items():
+            deltas[name] += value
+        deltas["transactions"] += 1
+    return totals
+
+
+def compact_ledger(before, chunk_size=50000, archive_dir=None, archive_format="jsonl"):
+    """
+    Fold ledger rows created before ``before`` into KarmaDailySummary and
+    delete them, ``chunk_size`` rows per transaction (and per archive file
+    with ``archive_dir``). Returns ``(rows compacted, archive paths)``.
+    """
+    # Deletes bind one id per row, under the backend's limit (999 on SQLite)
+    delete_batch = connection.features.max_query_params or chunk_size
+    compacted = 0
+    paths = []
+    while True:
+        with transaction.atomic():
+            # Oldest first, so a chunk covers a few days and only the day it
+            # shares with the previous chunk is already summarized
+            rows = list(
+                KarmaTransaction.objects
+                .filter(created_at__lt=before)
+                .order_by("created_at", "id")
+                .values(*ARCHIVE_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                break
+            if archive_dir:
+                paths.append(write_archive(archive_dir, rows, archive_format))
+            add_to_rollup(KarmaDailySummary, "day", _daily_totals(rows))
+            ids = [row["id"] for row in rows]
+            for start in range(0, len(ids), delete_batch):
+                KarmaTransaction.objects.filter(
+                    id__in=ids[start:start + delete_batch]
+                ).delete()
+        compacted += len(rows)
+    return compacted, paths
+
+
+def prune_buckets(before):
+    """Delete hourly KarmaBuckets older than ``before``; returns how many."""
+    # UserKarma 24h totals must have let go of them first
+    expire_karma_window()
+    deleted, _ = KarmaBucket.objects.filter(hour__lt=before).delete()
+    return deleted
@@ -0,0 +1,226 @@
+"""
+Set-based like writes: many likes or unlikes in a handful of statements.
+
+A ``LikeEvent`` names a user and a target ("post" or "comment").
+``apply_likes`` / ``apply_unlikes`` insert or delete the rows in one
+statement, move every affected counter with one CASE update per table and
+post the matching karma (negated for unlikes) to the ledger in bulk, so a
+batch costs the same few queries however large it is.
+"""
+from collections import Counter, namedtuple
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .events import publish_like_counts_on_commit
+from .karma import COMMENT_LIKE_POINTS, POST_LIKE_POINTS, award_karma_bulk, hour_bucket
+from .models import Comment, Like, Post, pk_case
+
+LikeEvent = namedtuple("LikeEvent", ["user_id", "kind", "target_id"])
+
+KINDS = ("post", "comment")
+POINTS = {"post": POST_LIKE_POINTS, "comment": COMMENT_LIKE_POINTS}
+
+
+def _pairs(events, kind):
+    return {(e.user_id, e.target_id) for e in events if e.kind == kind}
+
+
+def _likes_of(pairs, kind):
+    return Like.objects.filter(
+        user_id__in={user_id for user_id, _ in pairs},
+        **{f"{kind}_id__in": {target_id for _, target_id in pairs}},
+    )
+
+
+def liked_pairs(events, kind):
+    """``(user_id, target_id)`` pairs among ``events`` of ``kind`` already in the database."""
+    pairs = _pairs(events, kind)
+    if not pairs:
+        return set()
+    return set(
+        _likes_of(pairs, kind).values_list("user_id", f"{kind}_id")
+    ) & pairs
+
+
+def _insert_likes(events):
+    """
+    Insert a like per event and return the events whose row was written.
+
+    ``ON CONFLICT DO NOTHING ... RETURNING`` (PostgreSQL, SQLite 3.35+)
+    reports only the rows this statement inserted, so a like another
+    writer committed first is left out rather than counted twice.
+    """
+    quote = connection.ops.quote_name
+    fields = [Like._meta.get_field(name) for name in ("user", "post", "comment", "created_at")]
+    now = fields[-1].get_db_prep_value(timezone.now(), connection)
+    rows = [
+        (e.user_id, e.target_id if e.kind == "post" else None,
+         e.target_id if e.kind == "comment" else None, now)
+        for e in events
+    ]
+    max_params = connection.features.max_query_params
+    batch = max_params // len(fields) if max_params else len(rows)
+
+    inserted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch):
+            chunk = rows[start:start + batch]
+            cursor.execute(
+                f"INSERT INTO {quote(Like._meta.db_table)} "
+                f"({', '.join(quote(f.column) for f in fields)}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT DO NOTHING "
+                f"RETURNING {', '.join(quote(f.column) for f in fields[:3])}",
+                [value for row in chunk for value in row],
+            )
+            inserted.extend(cursor.fetchall())
+    written = {
+        LikeEvent(user_id, "post", post_id) if post_id is not None
+        else LikeEvent(user_id, "comment", comment_id)
+        for user_id, post_id, comment_id in inserted
+    }
+    return [e for e in events if e in written]
+
+
+def _targets(events):
+    """``{kind: {target_id: (author_id, post_id)}}`` for the targets that exist."""
+    posts = Post.objects.filter(
+        id__in={e.target_id for e in events if e.kind == "post"}
+    ).values_list("id", "author_id", "id")
+    comments = Comment.objects.filter(
+        id__in={e.target_id for e in events if e.kind == "comment"}
+    ).values_list("id", "author_id", "post_id")
+    return {
+        "post": {row[0]: row[1:] for row in posts},
+        "comment": {row[0]: row[1:] for row in comments},
+    }
+
+
+def _record(events, targets, sign, hours=None):
+    # Counters, post versions and karma for events that were just applied
+    post_likes = Counter(e.target_id for e in events if e.kind == "post")
+    comment_likes = Counter(e.target_id for e in events if e.kind == "comment")
+    for counts in (post_likes, comment_likes):
+        for pk in counts:
+            counts[pk] *= sign
+
+    if comment_likes:
+        Comment.objects.filter(pk__in=comment_likes).update(
+            like_count=F("like_count") + pk_case(comment_likes)
+        )
+    touched = Q(pk__in={targets["comment"][pk][1] for pk in comment_likes})
+    if post_likes:
+        touched |= Q(pk__in=post_likes)
+    counters = {"like_count": F("like_count") + pk_case(post_likes)} if post_likes else {}
+    Post.objects.filter(touched).touch(**counters)
+
+    award_karma_bulk(
+        [(targets[e.kind][e.target_id][0], sign * POINTS[e.kind]) for e in events],
+        hours,
+    )
+    publish_like_counts_on_commit(
+        post_ids=post_likes,
+        comment_posts={pk: targets["comment"][pk][1] for pk in comment_likes},
+    )
+
+
+def apply_likes(events):
+    """
+    Record ``events`` and return the ones that were new.
+
+    Duplicates, likes that already exist and likes of deleted targets are
+    dropped. Runs in one transaction; the unique constraints remain the
+    final word, so a like inserted concurrently by another writer is
+    skipped, and neither counted nor returned.
+    """
+    events = list(dict.fromkeys(events))
+    targets = _targets(events)
+
+    with transaction.atomic():
+        existing = {kind: liked_pairs(events, kind) for kind in KINDS}
+        new = [
+            e for e in events
+            if e.target_id in targets[e.kind]
+            and (e.user_id, e.target_id) not in existing[e.kind]
+        ]
+        if not new:
+            return []
+
+        new = _insert_likes(new)
+        if new:
+            _record(new, targets, 1)
+    return new
+
+
+def apply_unlikes(events):
+    """
+    Remove the likes named by ``events`` and return the ones that existed.
+
+    Each removal takes back its like: the counter goes down and the
+    author's karma is debited by the points the like earned, in the hourly
+    bucket the like was counted in. The likes are locked first, so a
+    concurrent unlike of the same like waits and then finds it gone.
+    """
+    events = list(dict.fromkeys(events))
+
+    with transaction.atomic():
+        like_ids = []
+        removed = []
+        hours = []
+        for kind in KINDS:
+            pairs = _pairs(events, kind)
+            if not pairs:
+                continue
+            rows = (
+                _likes_of(pairs, kind)
+                .select_for_update()
+                .values_list("id", "user_id", f"{kind}_id", "created_at")
+            )
+            for like_id, user_id, target_id, created_at in rows:
+                if (user_id, target_id) in pairs:
+                    like_ids.append(like_id)
+                    removed.append(LikeEvent(user_id, kind, target_id))
+                    hours.append(hour_bucket(created_at))
+        if not removed:
+            return []
+
+        Like.objects.filter(id__in=like_ids).delete()
+        _record(removed, _targets(removed), -1, hours)
+    return removed
+
+
+def apply_operations(operations):
+    """
+    Apply ``(op, event)`` pairs, ``op`` being "like" or "unlike", as one
+    transaction and return a status per pair.
+
+    Operations are resolved in order against the current likes, so a like
+    followed by an unlike of the same target nets out; only each target's
+    final state is written, with the set-based functions above.
+    """
+    events = [event for _, event in operations]
+    with transaction.atomic():
+        targets = _targets(events)
+        existing = {kind: liked_pairs(events, kind) for kind in KINDS}
+        before = {
+            e for e in events if (e.user_id, e.target_id) in existing[e.kind]
+        }
+        liked = set(before)
+
+        statuses = []
+        for op, event in operations:
+            if event.target_id not in targets[event.kind]:
+                statuses.append("not_found")
+            elif op == "like":
+                statuses.append("already_liked" if event in liked else "liked")
+                liked.add(event)
+            else:
+                statuses.append("unliked" if event in liked else "not_liked")
+                liked.discard(event)
+
+        ordered = list(dict.fromkeys(events))
+        apply_likes([e for e in ordered if e in liked and e not in before])
+        apply_unlikes([e for e in ordered if e in before and e not in liked])
+    return statuses
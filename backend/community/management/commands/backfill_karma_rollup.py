@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from community.karma import (
+    COMMENT_LIKE_POINTS,
+    POST_LIKE_POINTS,
+    booked_hour,
+    hour_bucket,
+    rebuild_user_karma,
+)
+from community.models import KarmaBucket, KarmaTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the hourly KarmaBucket rollup from the KarmaTransaction "
+        "ledger, then the per-user UserKarma totals from both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            help="Only rebuild buckets for the last N hours (default: all).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        # Unlikes count in the hour of their like, as they did live
+        ledger = KarmaTransaction.objects.annotate(hour=booked_hour())
+        buckets = KarmaBucket.objects.all()
+        if options["hours"] is not None:
+            since = hour_bucket(timezone.now() - timedelta(hours=options["hours"]))
+            # No row is booked before it was created, so created_at can
+            # narrow the scan
+            ledger = ledger.filter(created_at__gte=since, hour__gte=since)
+            buckets = buckets.filter(hour__gte=since)
+
+        rows = (
+            ledger
+            .values("user_id", "hour")
+            .annotate(
+                total=Sum("points"),
+                post_total=Coalesce(
+                    Sum(
+                        "points",
+                        filter=Q(points__in=[POST_LIKE_POINTS, -POST_LIKE_POINTS]),
+                    ),
+                    Value(0),
+                ),
+                comment_total=Coalesce(
+                    Sum(
+                        "points",
+                        filter=Q(points__in=[COMMENT_LIKE_POINTS, -COMMENT_LIKE_POINTS]),
+                    ),
+                    Value(0),
+                ),
+            )
+            .order_by()
+        )
+
+        created = 0
+        with transaction.atomic():
+            buckets.delete()
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(KarmaBucket(
+                    user_id=row["user_id"],
+                    hour=row["hour"],
+                    points=row["total"],
+                    post_karma=row["post_total"],
+                    comment_karma=row["comment_total"],
+                ))
+                if len(batch) >= batch_size:
+                    KarmaBucket.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            KarmaBucket.objects.bulk_create(batch)
+            created += len(batch)
+            users = rebuild_user_karma()
+
+        self.stdout.write(
+            f"Rebuilt {created} karma buckets and {users} user karma totals"
+        )
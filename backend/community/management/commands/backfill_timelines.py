@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from community.timeline import backfill_timelines, trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan existing posts out to their authors' and followers' home "
+        "timelines, then trim them. Run once after upgrading to timelines; "
+        "safe to rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = backfill_timelines(batch_size=options["batch_size"])
+        deleted = trim_timelines(batch_size=options["batch_size"])
+        self.stdout.write(
+            f"Backfilled timelines from {posts} posts, trimmed {deleted} entries"
+        )
@@ -0,0 +1,86 @@
+import json
+import logging
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from community.benchmark import ROUTES, run_benchmark
+from community.models import Comment, Like, Post
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route in community/urls.py against the seeded "
+        "dataset (run `seed` first): p50/p99 latency, queries per request "
+        "and peak memory, written as JSON for comparison across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument(
+            "--route",
+            action="append",
+            choices=ROUTES,
+            help="Only benchmark this route (repeatable).",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the cache before every request.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the report to this file instead of stdout.",
+        )
+
+    def handle(self, *args, **options):
+        # Per-request log lines would drown the report
+        request_log = logging.getLogger("community.requests")
+        level = request_log.level
+        request_log.setLevel(logging.ERROR)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                routes = run_benchmark(
+                    options["route"], options["iterations"], options["cold"]
+                )
+        except LookupError as exc:
+            raise CommandError(str(exc))
+        finally:
+            request_log.setLevel(level)
+
+        report = {
+            "commit": _git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "python": sys.version.split()[0],
+            "database": connection.vendor,
+            "dataset": {
+                "posts": Post.objects.count(),
+                "comments": Comment.objects.count(),
+                "likes": Like.objects.count(),
+            },
+            "iterations": options["iterations"],
+            "cold_cache": options["cold"],
+            "routes": routes,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+            self.stdout.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,247 @@
+import asyncio
+import io
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.urls import include, path
+
+from community.benchmark import Targets
+from community.urls import urlpatterns
+from community.views import ASYNC_READS
+
+MODES = ("wsgi_sync", "asgi_async")
+
+
+def _urlconf(async_reads):
+    # community/urls.py with the read routes on the sync views or their twins
+    twins = ASYNC_READS if async_reads else {v: k for k, v in ASYNC_READS.items()}
+    module = types.ModuleType("benchmark_async_urls")
+    module.urlpatterns = [path("api/", include([
+        path(str(pattern.pattern), twins.get(pattern.callback, pattern.callback))
+        for pattern in urlpatterns
+    ]))]
+    return module
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the feed, post detail and leaderboard reads with many "
+        "concurrent clients while every SQL query is delayed by --latency-ms: "
+        "once through the sync views the way one sync WSGI worker serves "
+        "them, once through their async twins on the ASGI application. "
+        "Reports throughput and latency per mode as JSON (run `seed` first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument(
+            "--requests", type=int, default=300, help="Requests per mode."
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=20,
+            help="Simulated database round trip added to every query.",
+        )
+        parser.add_argument(
+            "--sync-threads",
+            type=int,
+            default=1,
+            help="Requests one WSGI worker handles at once (1 for gunicorn sync workers).",
+        )
+        parser.add_argument("--mode", action="append", choices=MODES)
+
+    def handle(self, *args, **options):
+        # Imported first: setting up the ASGI handler reconfigures logging
+        from feed.asgi import application
+
+        try:
+            targets = Targets()
+        except LookupError as exc:
+            raise CommandError(str(exc))
+        reads = [
+            "/api/posts/",
+            f"/api/posts/{targets.post.id}/",
+            "/api/leaderboard/",
+        ]
+        auth = f"Token {targets.token.key}"
+
+        latency = options["latency_ms"] / 1000
+
+        def delay(execute, sql, params, many, context):
+            # SQLite's per-connection PRAGMAs are paid for in add_delay
+            if not sql.startswith("PRAGMA"):
+                time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # Both modes connect once per request; that is a round trip too
+            time.sleep(latency)
+            # First in line: execute_wrapper() pops the last wrapper on exit
+            if delay not in connection.execute_wrappers:
+                connection.execute_wrappers.insert(0, delay)
+
+        request_log = logging.getLogger("community.requests")
+        level = request_log.level
+        request_log.setLevel(logging.ERROR)
+        connection_created.connect(add_delay)
+        for connection in connections.all():
+            if delay not in connection.execute_wrappers:
+                connection.execute_wrappers.insert(0, delay)
+        report = {
+            "clients": options["clients"],
+            "latency_ms": options["latency_ms"],
+            "sync_threads": options["sync_threads"],
+            "modes": {},
+        }
+        try:
+            for mode in options["mode"] or MODES:
+                with override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                    ROOT_URLCONF=_urlconf(mode == "asgi_async"),
+                ):
+                    if mode == "wsgi_sync":
+                        get = self._wsgi_client(options["sync_threads"])
+                    else:
+                        get = self._asgi_client(application)
+                    report["modes"][mode] = asyncio.run(
+                        self._run(get, reads, auth, options)
+                    )
+        finally:
+            connection_created.disconnect(add_delay)
+            for connection in connections.all():
+                if delay in connection.execute_wrappers:
+                    connection.execute_wrappers.remove(delay)
+            request_log.setLevel(level)
+
+        modes = report["modes"]
+        if len(modes) == len(MODES):
+            report["async_speedup"] = round(
+                modes["asgi_async"]["requests_per_second"]
+                / modes["wsgi_sync"]["requests_per_second"], 2
+            )
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _wsgi_client(self, threads):
+        handler = WSGIHandler()
+        pool = ThreadPoolExecutor(threads)
+
+        def call(path, auth):
+            status = []
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": "",
+                "SERVER_NAME": "testserver",
+                "SERVER_PORT": "80",
+                "SERVER_PROTOCOL": "HTTP/1.1",
+                "HTTP_HOST": "testserver",
+                "HTTP_AUTHORIZATION": auth,
+                "wsgi.input": io.BytesIO(),
+                "wsgi.errors": sys.stderr,
+                "wsgi.url_scheme": "http",
+            }
+            response = handler(environ, lambda line, headers: status.append(line))
+            try:
+                b"".join(response)
+            finally:
+                response.close()
+            return int(status[0].split()[0])
+
+        async def get(path, auth):
+            # Clients beyond the worker's threads queue, as at a real worker
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, call, path, auth
+            )
+
+        return get
+
+    def _asgi_client(self, application):
+        async def get(path, auth):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": path,
+                "raw_path": path.encode(),
+                "root_path": "",
+                "query_string": b"",
+                "headers": [
+                    (b"host", b"testserver"),
+                    (b"authorization", auth.encode()),
+                ],
+                "client": ("127.0.0.1", 0),
+                "server": ("testserver", 80),
+            }
+            requested = False
+            status = []
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                # Never disconnects; the handler stops listening once done
+                await asyncio.Future()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            await application(scope, receive, send)
+            return status[0]
+
+        return get
+
+    async def _run(self, get, reads, auth, options):
+        # Warm the payload cache and the token cache first
+        for read in reads:
+            await get(read, auth)
+
+        issued = iter(range(options["requests"]))
+        timings = []
+        statuses = {}
+        peak_threads = threading.active_count()
+
+        async def client():
+            for i in issued:
+                started = time.perf_counter()
+                status = await get(reads[i % len(reads)], auth)
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        async def watch_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        watcher = asyncio.ensure_future(watch_threads())
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options["clients"])))
+        elapsed = time.perf_counter() - started
+        watcher.cancel()
+
+        return {
+            "requests": len(timings),
+            "statuses": statuses,
+            "seconds": round(elapsed, 2),
+            "requests_per_second": round(len(timings) / elapsed, 1),
+            "p50_ms": round(statistics.median(timings), 1),
+            "p99_ms": round(statistics.quantiles(timings, n=100)[98], 1),
+            "peak_threads": peak_threads,
+        }
@@ -0,0 +1,136 @@
+import json
+import multiprocessing
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from community.models import Post
+from community.views import create_comment, list_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent feed readers and comment writers (one process each, "
+        "like gunicorn workers) against the default database and report "
+        "throughput. Compare profiles by running it "
+        "twice, e.g. with SQLITE_TUNING=False and without, against a scratch "
+        "DATABASE_URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--posts", type=int, default=50)
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Keep the response cache on (off by default, to measure the database).",
+        )
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username="bench-user")
+        post_ids = self._posts(user, options["posts"])
+
+        factory = APIRequestFactory()
+        # Forked workers inherit settings and open their own connections
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+        queue = context.Queue()
+
+        def read():
+            return list_posts(factory.get("/api/posts/", {"view": "summary"}))
+
+        def write():
+            post_id = random.choice(post_ids)
+            request = factory.post(
+                f"/api/posts/{post_id}/comments/", {"content": "bench"}
+            )
+            force_authenticate(request, user=user)
+            return create_comment(request, post_id=post_id)
+
+        def worker(kind, call):
+            timings = []
+            failed = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    call()
+                except DatabaseError:
+                    # "database is locked" and friends
+                    failed += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+            connection.close()
+            queue.put((kind, timings, failed))
+
+        workers = [
+            context.Process(target=worker, args=("read", read))
+            for _ in range(options["readers"])
+        ] + [
+            context.Process(target=worker, args=("write", write))
+            for _ in range(options["writers"])
+        ]
+
+        caches = {} if options["cache"] else {
+            "CACHES": {
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+        }
+        results = {"read": [], "write": []}
+        errors = {"read": 0, "write": 0}
+        connections.close_all()
+        with override_settings(**caches):
+            for process in workers:
+                process.start()
+            time.sleep(options["duration"])
+            stop.set()
+            for _ in workers:
+                kind, timings, failed = queue.get()
+                results[kind].extend(timings)
+                errors[kind] += failed
+            for process in workers:
+                process.join()
+
+        report = {
+            "vendor": connection.vendor,
+            "profile": {
+                "options": connection.settings_dict.get("OPTIONS", {}),
+                "conn_max_age": connection.settings_dict.get("CONN_MAX_AGE"),
+            },
+            "duration_s": options["duration"],
+        }
+        for kind, timings in results.items():
+            report[kind] = {
+                "ops": len(timings),
+                "ops_per_s": round(len(timings) / options["duration"], 1),
+                "errors": errors[kind],
+                "p50_ms": self._ms(timings, 50),
+                "p99_ms": self._ms(timings, 99),
+            }
+        self.stdout.write(json.dumps(report, indent=2, default=str))
+
+    def _posts(self, user, count):
+        post_ids = list(
+            Post.objects.filter(author=user).values_list("id", flat=True)[:count]
+        )
+        missing = count - len(post_ids)
+        if missing > 0:
+            created = Post.objects.bulk_create(
+                Post(author=user, content=f"bench post {i}") for i in range(missing)
+            )
+            post_ids += [post.id for post in created]
+        return post_ids
+
+    @staticmethod
+    def _ms(timings, percentile):
+        if len(timings) < 2:
+            return None
+        cut = statistics.quantiles(timings, n=100)[percentile - 1]
+        return round(cut * 1000, 2)
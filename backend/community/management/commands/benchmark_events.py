@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from community.events import get_broker, post_channel
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many idle /api/events/ streams against the ASGI application in "
+        "this process, then publish events from a writer thread and report "
+        "connection cost and delivery latency as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=5000)
+        parser.add_argument(
+            "--posts", type=int, default=100, help="Posts the clients spread over."
+        )
+        parser.add_argument(
+            "--events", type=int, default=20, help="Like events per post."
+        )
+
+    def handle(self, *args, **options):
+        # Imported first: setting up the ASGI handler reconfigures logging
+        from feed.asgi import application
+
+        # One log line per stream would drown the report
+        request_log = logging.getLogger("community.requests")
+        level = request_log.level
+        request_log.setLevel(logging.ERROR)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                report = asyncio.run(self._run(application, options))
+        finally:
+            request_log.setLevel(level)
+        self.stdout.write(json.dumps(report, indent=2))
+
+    async def _run(self, application, options):
+        loop = asyncio.get_running_loop()
+        broker = get_broker()
+        received = []
+        disconnect = asyncio.Event()
+
+        def client(post_id):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/api/events/",
+                "raw_path": b"/api/events/",
+                "root_path": "",
+                "query_string": f"posts={post_id}".encode(),
+                "headers": [(b"host", b"testserver")],
+                "client": ("127.0.0.1", 0),
+                "server": ("testserver", 80),
+            }
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                body = message.get("body", b"")
+                if message["type"] == "http.response.body" and b"data:" in body:
+                    received.append(time.perf_counter())
+
+            return application(scope, receive, send)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        tasks = [
+            asyncio.ensure_future(client(i % options["posts"] + 1))
+            for i in range(options["connections"])
+        ]
+        # Wait until every stream has subscribed
+        while broker.subscriber_count() < options["connections"]:
+            await asyncio.sleep(0.05)
+        connect_s = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # Publish from a thread, like the write views do
+        sent = []
+
+        def publish():
+            for n in range(options["events"]):
+                for post_id in range(1, options["posts"] + 1):
+                    sent.append(time.perf_counter())
+                    broker.publish(post_channel(post_id), {
+                        "type": "post.likes", "post_id": post_id, "like_count": n,
+                    })
+
+        expected = options["connections"] * options["events"]
+        publish_started = time.perf_counter()
+        writer = threading.Thread(target=publish)
+        writer.start()
+        while len(received) < expected and time.perf_counter() - publish_started < 60:
+            await asyncio.sleep(0.01)
+        writer.join()
+        delivery_s = time.perf_counter() - publish_started
+
+        disconnect.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        return {
+            "connections": options["connections"],
+            "connect_seconds": round(connect_s, 2),
+            "rss_kib_per_connection": round((rss_after - rss_before) / options["connections"], 2),
+            "threads": threading.active_count(),
+            "events_published": len(sent),
+            "deliveries": len(received),
+            "deliveries_per_second": round(len(received) / delivery_s),
+            "all_delivered_ms": round(delivery_s * 1000, 1),
+            "subscribers_left": broker.subscriber_count(),
+        }
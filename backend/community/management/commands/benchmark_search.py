@@ -0,0 +1,129 @@
+import itertools
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError, connection, transaction
+from django.utils import timezone
+
+from community.models import Comment, Post
+from community.ranking import hot_score
+from community.search import search
+
+SYLLABLES = ["ka", "lo", "mi", "nu", "ra", "to", "vi", "shu", "po", "za"]
+VOCABULARY = 20000
+WORDS_PER_POST = 12
+# Vocabulary ranks queried: very common, middling and rare words
+QUERY_RANKS = {"common": 2, "mid": 100, "rare": 5000}
+
+
+def word(rank):
+    # Distinct, stemmer-stable pseudo-words: rank spelled in syllables
+    digits = str(rank + 10)
+    return "".join(SYLLABLES[int(d)] for d in digits)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load synthetic posts with Zipf-distributed words (--add) and time "
+        "ranked full-text searches against them, next to the unindexed "
+        "icontains scan they replace. Use a scratch DATABASE_URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--add", type=int, default=0, help="Synthetic posts to insert first."
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--baseline-iterations",
+            type=int,
+            default=3,
+            help="Runs of the icontains table scan per query (0 to skip it).",
+        )
+        parser.add_argument("--alpha", type=float, default=1.0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["add"]:
+            started = time.perf_counter()
+            self._load(options)
+            self.stderr.write(
+                f"Inserted {options['add']} posts in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+
+        queries = {name: word(rank) for name, rank in QUERY_RANKS.items()}
+        queries["two_words"] = f"{word(QUERY_RANKS['mid'])} {word(QUERY_RANKS['mid'] + 1)}"
+
+        results = {}
+        for name, query in queries.items():
+            try:
+                search_ms = self._time(
+                    lambda: search(query), options["iterations"]
+                )
+            except NotSupportedError as exc:
+                raise CommandError(str(exc))
+            entry = {
+                "query": query,
+                "search_p50_ms": _percentile(search_ms, 50),
+                "search_p99_ms": _percentile(search_ms, 99),
+            }
+            if options["baseline_iterations"]:
+                # Ranking without an index means finding every match first
+                scan = Post.objects.filter(content__icontains=query.split()[0])
+                scan_ms = self._time(scan.count, options["baseline_iterations"])
+                entry["icontains_scan_p50_ms"] = _percentile(scan_ms, 50)
+                entry["icontains_matches"] = scan.count()
+            results[name] = entry
+
+        self.stdout.write(json.dumps({
+            "database": connection.vendor,
+            "posts": Post.objects.count(),
+            "comments": Comment.objects.count(),
+            "queries": results,
+        }, indent=2))
+
+    def _load(self, options):
+        rng = random.Random(options["seed"])
+        ranks = range(VOCABULARY)
+        weights = list(itertools.accumulate(
+            1 / (rank + 1) ** options["alpha"] for rank in ranks
+        ))
+        words = [word(rank) for rank in ranks]
+        user, _ = User.objects.get_or_create(username="search-bench")
+        now = timezone.now()
+
+        remaining = options["add"]
+        while remaining:
+            size = min(remaining, options["batch_size"])
+            posts = []
+            for _ in range(size):
+                posts.append(Post(
+                    author=user,
+                    content=" ".join(
+                        rng.choices(words, cum_weights=weights, k=WORDS_PER_POST)
+                    ),
+                    hot_score=hot_score(0, 0, now),
+                ))
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+            remaining -= size
+
+    def _time(self, call, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+
+def _percentile(values, percentile):
+    if len(values) < 2:
+        return round(values[0], 2)
+    return round(statistics.quantiles(values, n=100)[percentile - 1], 2)
@@ -0,0 +1,55 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from community.ledger import ARCHIVE_FORMATS, compact_ledger, ledger_cutoff, prune_buckets
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold KarmaTransaction rows older than the retention window into "
+        "per-user daily summaries and delete them, optionally archiving the "
+        "raw rows first as gzip-compressed JSONL or CSV chunks. Lifetime "
+        "karma totals are unchanged. Run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=settings.KARMA_LEDGER_RETENTION_DAYS,
+            help="Keep raw rows for this many days (default KARMA_LEDGER_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50000,
+            help="Rows per transaction and per archive file.",
+        )
+        parser.add_argument(
+            "--archive", metavar="DIR", help="Write raw rows here before deleting them."
+        )
+        parser.add_argument("--format", choices=ARCHIVE_FORMATS, default="jsonl")
+
+    def handle(self, *args, **options):
+        # The leaderboard and backfill_karma_rollup --hours 24 need a day
+        if options["retention_days"] < 1:
+            raise CommandError("--retention-days must be at least 1")
+        if options["archive"]:
+            os.makedirs(options["archive"], exist_ok=True)
+
+        before = ledger_cutoff(options["retention_days"], timezone.now())
+        compacted, paths = compact_ledger(
+            before,
+            chunk_size=options["chunk_size"],
+            archive_dir=options["archive"],
+            archive_format=options["format"],
+        )
+        pruned = prune_buckets(before)
+
+        summary = f"Compacted {compacted} ledger rows before {before.date()} into daily summaries"
+        if options["archive"]:
+            summary += f", archived in {len(paths)} files"
+        self.stdout.write(f"{summary}; deleted {pruned} hourly buckets")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from community.karma import expire_karma_window, karma_window_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Subtract the hourly karma buckets that have left the 24h window from "
+        "the stored UserKarma totals. Run hourly, e.g. from cron."
+    )
+
+    def handle(self, *args, **options):
+        moved = expire_karma_window()
+        self.stdout.write(
+            f"Moved {moved} karma totals to the window starting {karma_window_start():%Y-%m-%d %H:%M}"
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from community.search import index_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop and recreate the full-text search index from the current posts "
+        "and comments. Needed on SQLite after a migration rebuilds either table."
+    )
+
+    def handle(self, *args, **options):
+        create, drop = index_schema(connection.vendor)
+        if not create:
+            self.stdout.write(f"Search is not available on {connection.vendor}")
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in drop + create:
+                cursor.execute(sql)
+        self.stdout.write("Rebuilt the search index")
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from community.models import Post
+from community.ranking import hot_age_offsets, hot_score_expression
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.hot_score from the like/comment counters and creation "
+        "time. Run periodically, and after changing the ranking weights."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--active-within",
+            type=float,
+            metavar="HOURS",
+            help="Only posts with activity in the last HOURS hours.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by("id")
+        if options["active_within"] is not None:
+            posts = posts.filter(
+                last_activity_at__gte=timezone.now()
+                - timedelta(hours=options["active_within"])
+            )
+
+        refreshed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                posts.filter(id__gt=last_id)
+                .values_list("id", "created_at")[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            # Counters are read inside the UPDATE so concurrent likes are not lost
+            refreshed += Post.objects.filter(
+                id__in=[pk for pk, _ in batch]
+            ).update(hot_score=hot_score_expression(hot_age_offsets(batch)))
+            last_id = batch[-1][0]
+
+        self.stdout.write(f"Refreshed {refreshed} hot scores")
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from community.models import Comment, Like, Post
+from community.ranking import hot_age_offsets, hot_score_expression
+
+
+def actual_count(model, fk, **filters):
+    return Coalesce(
+        Subquery(
+            model.objects
+            .filter(**{fk: OuterRef("pk")}, **filters)
+            .order_by()
+            .values(fk)
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _post_ids(model, pks):
+    if model is Post:
+        return pks
+    return model.objects.filter(pk__in=pks).values("post_id")
+
+
+COUNTERS = [
+    (Post, {
+        "like_count": lambda: actual_count(Like, "post"),
+        "comment_count": lambda: actual_count(Comment, "post"),
+        "reply_count": lambda: actual_count(Comment, "post", parent__isnull=True),
+    }),
+    (Comment, {
+        "like_count": lambda: actual_count(Like, "comment"),
+        "reply_count": lambda: actual_count(Comment, "parent"),
+    }),
+]
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized like/comment/reply counters and repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted rows, do not update them.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        batch_size = options["batch_size"]
+
+        for model, counters in COUNTERS:
+            drift = Q()
+            for name in counters:
+                drift |= ~Q(**{name: F(f"actual_{name}")})
+
+            drifted_ids = list(
+                model.objects
+                .annotate(**{f"actual_{name}": expr() for name, expr in counters.items()})
+                .filter(drift)
+                .values_list("pk", flat=True)
+            )
+
+            if not dry_run:
+                for i in range(0, len(drifted_ids), batch_size):
+                    batch = drifted_ids[i:i + batch_size]
+                    # Recomputed inside the UPDATE so concurrent likes are not lost
+                    updates = {name: expr() for name, expr in counters.items()}
+                    if model is Post:
+                        # The hot score follows the repaired counters
+                        updates["hot_score"] = hot_score_expression(
+                            hot_age_offsets(
+                                Post.objects.filter(pk__in=batch).values_list("id", "created_at")
+                            ),
+                            counters["like_count"](),
+                            counters["comment_count"](),
+                        )
+                    model.objects.filter(pk__in=batch).update(**updates)
+                    # Retire cached payloads and ETags of the affected posts
+                    Post.objects.filter(pk__in=_post_ids(model, batch)).touch()
+
+            verb = "drifted" if dry_run else "repaired"
+            self.stdout.write(f"{model.__name__}: {len(drifted_ids)} {verb}")
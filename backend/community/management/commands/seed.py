@@ -0,0 +1,51 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from community.seed import SEED_PASSWORD, seed_community
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic community: users, posts with power-law comment "
+        "threads, likes, follows with their home timelines and the matching karma. Same --seed, same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=200)
+        parser.add_argument("--comments", type=int, default=2000)
+        parser.add_argument("--likes", type=int, default=5000)
+        parser.add_argument("--follows", type=int, default=500)
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.1,
+            help="Zipf exponent for how activity concentrates on popular posts.",
+        )
+        parser.add_argument("--max-depth", type=int, default=8)
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=2,
+            help="Spread content over the last N days.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = seed_community(
+            users=options["users"],
+            posts=options["posts"],
+            comments=options["comments"],
+            likes=options["likes"],
+            follows=options["follows"],
+            alpha=options["alpha"],
+            max_depth=options["max_depth"],
+            span=timedelta(days=options["days"]),
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(json.dumps(counts))
+        self.stdout.write(f"Seeded users log in with password {SEED_PASSWORD!r}")
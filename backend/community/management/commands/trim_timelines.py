@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from community.timeline import trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete home timeline entries beyond the newest "
+        "TIMELINE_MAX_ENTRIES per user. Run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = trim_timelines(batch_size=options["batch_size"])
+        self.stdout.write(
+            f"Deleted {deleted} entries beyond {settings.TIMELINE_MAX_ENTRIES} per timeline"
+        )
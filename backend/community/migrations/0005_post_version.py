@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0004_karma_buckets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="last_activity_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _replies(Comment, **filters):
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(**filters)
+            .order_by()
+            .values("post")
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def backfill_reply_counts(apps, schema_editor):
+    Post = apps.get_model("community", "Post")
+    Comment = apps.get_model("community", "Comment")
+
+    Post.objects.update(
+        reply_count=_replies(Comment, post=OuterRef("pk"), parent__isnull=True)
+    )
+    Comment.objects.update(reply_count=_replies(Comment, parent=OuterRef("pk")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0005_post_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="reply_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="reply_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "parent", "created_at", "id"],
+                name="comment_children_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_reply_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _segment(pk):
+    digits = ""
+    while pk:
+        pk, rem = divmod(pk, 36)
+        digits = _BASE36[rem] + digits
+    return digits.rjust(8, "0")
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model("community", "Comment")
+
+    # Parents always have smaller ids than their replies, so walking in id
+    # order means every parent's path is already stored when a reply needs it
+    last_id = 0
+    while True:
+        batch = list(
+            Comment.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "parent_id")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        known = {
+            parent.id: (parent.path, parent.depth)
+            for parent in Comment.objects.filter(
+                id__in={c.parent_id for c in batch if c.parent_id}
+            ).only("id", "path", "depth")
+        }
+        for comment in batch:
+            parent_path, parent_depth = known.get(comment.parent_id, ("", -1))
+            comment.path = parent_path + _segment(comment.id)
+            comment.depth = parent_depth + 1
+            known[comment.id] = (comment.path, comment.depth)
+
+        Comment.objects.bulk_update(batch, ["path", "depth"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0006_reply_counts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(default="", editable=False, max_length=1024),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["post", "path"], name="comment_thread_idx"),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+from community.ranking import hot_score
+
+BATCH_SIZE = 1000
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Post = apps.get_model("community", "Post")
+
+    last_id = 0
+    while True:
+        batch = list(
+            Post.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "like_count", "comment_count", "created_at")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for post in batch:
+            post.hot_score = hot_score(post.like_count, post.comment_count, post.created_at)
+        Post.objects.bulk_update(batch, ["hot_score"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0008_follows_timeline"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="hot_score",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["-hot_score", "-id"], name="post_hot_idx"),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from community.search import index_schema
+
+
+def create_index(apps, schema_editor):
+    create, _ = index_schema(schema_editor.connection.vendor)
+    for sql in create:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    _, drop = index_schema(schema_editor.connection.vendor)
+    for sql in drop:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0009_post_hot_score"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0010_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KarmaDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("points", models.IntegerField(default=0)),
+                ("post_karma", models.IntegerField(default=0)),
+                ("comment_karma", models.IntegerField(default=0)),
+                ("transactions", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="karmatransaction",
+            index=models.Index(
+                fields=["user", "created_at"], name="karma_txn_user_created_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="karmadailysummary",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="karma_days",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="karmadailysummary",
+            constraint=models.UniqueConstraint(
+                fields=("user", "day"), name="unique_karma_day"
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:28
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def backfill_user_karma(apps, schema_editor):
+    KarmaBucket = apps.get_model("community", "KarmaBucket")
+    KarmaDailySummary = apps.get_model("community", "KarmaDailySummary")
+    KarmaTransaction = apps.get_model("community", "KarmaTransaction")
+    UserKarma = apps.get_model("community", "UserKarma")
+
+    window_start = (timezone.now() - timedelta(hours=24)).replace(
+        minute=0, second=0, microsecond=0
+    )
+    rows = {}
+
+    def row(user_id):
+        if user_id not in rows:
+            rows[user_id] = UserKarma(user_id=user_id, window_start=window_start)
+        return rows[user_id]
+
+    for model in (KarmaTransaction, KarmaDailySummary):
+        for user_id, points in (
+            model.objects.values("user_id").annotate(total=Sum("points"))
+            .order_by().values_list("user_id", "total")
+        ):
+            row(user_id).lifetime += points
+    for user_id, points, post_karma, comment_karma in (
+        KarmaBucket.objects.filter(hour__gte=window_start)
+        .values("user_id")
+        .annotate(
+            total=Sum("points"),
+            post_total=Sum("post_karma"),
+            comment_total=Sum("comment_karma"),
+        )
+        .order_by()
+        .values_list("user_id", "total", "post_total", "comment_total")
+    ):
+        user_karma = row(user_id)
+        user_karma.karma_24h = points
+        user_karma.post_karma_24h = post_karma
+        user_karma.comment_karma_24h = comment_karma
+    UserKarma.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("community", "0011_karma_ledger_compaction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserKarma",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="karma",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("lifetime", models.IntegerField(default=0)),
+                ("karma_24h", models.IntegerField(default=0)),
+                ("post_karma_24h", models.IntegerField(default=0)),
+                ("comment_karma_24h", models.IntegerField(default=0)),
+                ("window_start", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-karma_24h", "user"], name="user_karma_24h_idx"
+                    ),
+                    models.Index(
+                        fields=["-lifetime", "user"], name="user_karma_lifetime_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_user_karma, migrations.RunPython.noop),
+    ]
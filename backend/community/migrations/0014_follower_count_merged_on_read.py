@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0013_comment_children_by_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="followercount",
+            name="merged_on_read",
+            field=models.BooleanField(default=False),
+        ),
+    ]
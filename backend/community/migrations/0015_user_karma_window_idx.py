@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0014_follower_count_merged_on_read"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userkarma",
+            index=models.Index(fields=["window_start"], name="user_karma_window_idx"),
+        ),
+    ]
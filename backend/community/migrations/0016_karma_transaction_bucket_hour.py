@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0015_user_karma_window_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="karmatransaction",
+            name="bucket_hour",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,36 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models import UniqueConstraint
+from django.db.models import Case, F, IntegerField, UniqueConstraint, Value, When
+from django.utils import timezone
+
+from .ranking import hot_score, hot_score_update
+
+
+def pk_case(values):
+    """``CASE pk WHEN ... THEN n ELSE 0 END``: per-row deltas for one UPDATE."""
+    return Case(
+        *(When(pk=pk, then=Value(n)) for pk, n in values.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+class PostQuerySet(models.QuerySet):
+    def touch(self, **updates):
+        """
+        Apply ``updates`` and mark the posts changed for caches and ETags.
+        Counter changes move ``hot_score`` in the same UPDATE.
+        """
+        if "like_count" in updates or "comment_count" in updates:
+            updates["hot_score"] = hot_score_update(
+                updates.get("like_count", F("like_count")),
+                updates.get("comment_count", F("comment_count")),
+            )
+        return self.update(
+            version=F("version") + 1,
+            last_activity_at=timezone.now(),
+            **updates,
+        )
 
 
 class Post(models.Model):
@@ -9,17 +39,56 @@ class Post(models.Model):
     )
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized counters, maintained with F() updates by the write views
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    # Top-level comments only; lets truncated trees report "has more"
+    reply_count = models.PositiveIntegerField(default=0)
+    # Bumped by every comment/like write; drives caching and conditional GET
+    version = models.PositiveIntegerField(default=1)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    # Time-decayed engagement for the hot feed; see community/ranking.py
+    hot_score = models.FloatField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="post_feed_idx"),
+            # One author's posts, newest first (fan-out on read, backfill)
+            models.Index(
+                fields=["author", "-created_at", "-id"], name="post_author_idx"
+            ),
+            models.Index(fields=["-hot_score", "-id"], name="post_hot_idx"),
+        ]
 
     def __str__(self):
         return f"Post {self.id} by {self.author.username}"
 
-    @property
-    def comment_count(self):
-        return self.comments.count()
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # created_at is only stamped during the insert; now is close enough
+            self.hot_score = hot_score(
+                self.like_count, self.comment_count, self.created_at or timezone.now()
+            )
+        super().save(*args, **kwargs)
+
 
-    @property
-    def like_count(self):
-        return self.post_likes.count()
+# Materialized path: one fixed-width base-36 segment per ancestor id, so
+# ORDER BY path walks a thread depth-first, siblings by id
+PATH_SEGMENT_WIDTH = 8
+PATH_MAX_LENGTH = 1024
+# Deepest reply whose path still fits (top-level comments are depth 0)
+MAX_COMMENT_DEPTH = PATH_MAX_LENGTH // PATH_SEGMENT_WIDTH - 1
+_BASE36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def path_segment(pk):
+    digits = ""
+    while pk:
+        pk, rem = divmod(pk, 36)
+        digits = _BASE36[rem] + digits
+    return digits.rjust(PATH_SEGMENT_WIDTH, "0")
 
 
 class Comment(models.Model):
@@ -38,13 +107,41 @@ class Comment(models.Model):
     )
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    like_count = models.PositiveIntegerField(default=0)
+    # Direct children only
+    reply_count = models.PositiveIntegerField(default=0)
+    path = models.CharField(max_length=PATH_MAX_LENGTH, default="", editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "path"], name="comment_thread_idx"),
+            # One range scan per slice of a comment's (or post's) children,
+            # in the sibling order of ``path``
+            models.Index(
+                fields=["post", "parent", "id"],
+                name="comment_children_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Comment {self.id} by {self.author.username}"
 
-    @property
-    def like_count(self):
-        return self.comment_likes.count()
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_id:
+            self.depth = self.parent.depth + 1
+        super().save(*args, **kwargs)
+        if not self.path:
+            # The last segment is our own id, so it is written after the insert
+            parent_path = self.parent.path if self.parent_id else ""
+            self.path = parent_path + path_segment(self.id)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    def subtree(self):
+        """This comment and all its replies in display order (one prefix scan)."""
+        return Comment.objects.filter(
+            post_id=self.post_id, path__startswith=self.path
+        ).order_by("path")
 
 
 class Like(models.Model):
@@ -88,7 +185,175 @@ class KarmaTransaction(models.Model):
         User, on_delete=models.CASCADE, related_name="karma_transactions"
     )
     points = models.IntegerField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # The KarmaBucket hour the row was booked into when that is not the
+    # hour of created_at: an unlike debits the hour of the like it undoes
+    bucket_hour = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # One user's ledger over a time range
+            models.Index(fields=["user", "created_at"], name="karma_txn_user_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.points} karma → {self.user.username}"
+
+
+class KarmaBucket(models.Model):
+    """Hourly rollup of KarmaTransaction, written alongside each ledger row."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="karma_buckets"
+    )
+    hour = models.DateTimeField()
+    points = models.IntegerField(default=0)
+    post_karma = models.IntegerField(default=0)
+    comment_karma = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "hour"],
+                name="unique_karma_bucket",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="karma_bucket_hour_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.points} karma → {self.user.username} @ {self.hour}"
+
+
+class KarmaDailySummary(models.Model):
+    """
+    Per-user daily totals of KarmaTransaction rows compacted out of the
+    ledger (see community/ledger.py). Lifetime karma is the ledger plus
+    these.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="karma_days"
+    )
+    day = models.DateField()
+    points = models.IntegerField(default=0)
+    post_karma = models.IntegerField(default=0)
+    comment_karma = models.IntegerField(default=0)
+    # Ledger rows folded in
+    transactions = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "day"],
+                name="unique_karma_day",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.points} karma → {self.user.username} on {self.day}"
+
+
+class UserKarma(models.Model):
+    """
+    A user's karma totals, kept current by the writers that award karma:
+    lifetime, and the last 24h, which is the sum of the user's KarmaBuckets
+    from ``window_start`` on (the hourly ``expire_karma_window`` command
+    moves it forward).
+    Both totals are indexed in leaderboard order, so ranks and pages are
+    index scans. Rows exist for users who have ever had karma.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="karma"
+    )
+    lifetime = models.IntegerField(default=0)
+    karma_24h = models.IntegerField(default=0)
+    post_karma_24h = models.IntegerField(default=0)
+    comment_karma_24h = models.IntegerField(default=0)
+    window_start = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-karma_24h", "user"], name="user_karma_24h_idx"),
+            models.Index(fields=["-lifetime", "user"], name="user_karma_lifetime_idx"),
+            # The oldest window_start bounds the buckets expiry scans
+            models.Index(fields=["window_start"], name="user_karma_window_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.karma_24h} (24h), {self.lifetime} (lifetime)"
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="following"
+    )
+    followee = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="followers"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["follower", "followee"],
+                name="unique_follow",
+            ),
+        ]
+        indexes = [
+            # Fan-out reads an author's followers
+            models.Index(fields=["followee", "follower"], name="follow_followee_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.follower.username} → {self.followee.username}"
+
+
+class FollowerCount(models.Model):
+    """Denormalized follower count; decides fan-out on write vs on read."""
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="follower_count",
+    )
+    count = models.PositiveIntegerField(default=0)
+    # Set once the count goes over TIMELINE_FANOUT_MAX_FOLLOWERS: posts from
+    # then on may be missing from timelines, so reads keep merging them in
+    merged_on_read = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.count} followers"
+
+
+class TimelineEntry(models.Model):
+    """
+    One post in one user's materialized home timeline. ``created_at`` is
+    the post's, copied so a page is a range scan on a single index.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline"
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "post"],
+                name="unique_timeline_entry",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-post"],
+                name="timeline_page_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.user_id}'s timeline"
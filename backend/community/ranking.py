@@ -0,0 +1,75 @@
+"""
+"Hot" ranking for the feed.
+
+A post's score is ``log10(engagement) + age_offset``, where engagement is
+its weighted likes and comments and ``age_offset`` grows with its creation
+time: every HOT_DECAY_SECONDS of recency is worth ten times the
+engagement. Ordering by that is ordering by engagement decayed
+exponentially with age, but a stored score never has to be rewritten as
+the clock moves, so ``post_hot_idx`` stays valid and the hot feed is an
+indexed ORDER BY like the newest-first one.
+
+Scores change only when engagement does: ``PostQuerySet.touch`` folds the
+counter change into the same UPDATE (see ``hot_score_update``), and the
+``refresh_hot_scores`` and ``repair_counters`` commands recompute them
+from the counters.
+"""
+import math
+from datetime import datetime, timezone
+
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest, Ln
+
+HOT_LIKE_WEIGHT = 1
+HOT_COMMENT_WEIGHT = 2
+HOT_DECAY_SECONDS = 45000
+# Keeps the age offset small; any fixed instant would do
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+HOT_ORDERING = ("-hot_score", "-id")
+
+
+def hot_age_offset(created_at):
+    return (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+def hot_score(like_count, comment_count, created_at):
+    engagement = like_count * HOT_LIKE_WEIGHT + comment_count * HOT_COMMENT_WEIGHT
+    return math.log10(max(engagement, 1)) + hot_age_offset(created_at)
+
+
+def _log10_engagement(likes, comments):
+    engagement = likes * HOT_LIKE_WEIGHT + comments * HOT_COMMENT_WEIGHT
+    # LN rather than LOG: PostgreSQL's two-argument LOG only takes numerics
+    return Ln(Greatest(engagement, Value(1))) / Value(math.log(10))
+
+
+def hot_score_update(like_count, comment_count):
+    """
+    Expression for ``hot_score`` once the counters are set to
+    ``like_count``/``comment_count`` (expressions over the current row).
+    UPDATE reads every column's old value, so the row's age offset is
+    carried over as the old score minus the old engagement term.
+    """
+    return (
+        F("hot_score")
+        - _log10_engagement(F("like_count"), F("comment_count"))
+        + _log10_engagement(like_count, comment_count)
+    )
+
+
+def hot_age_offsets(rows):
+    """CASE expression of each row's age offset, for ``(pk, created_at)`` rows."""
+    return Case(
+        *(When(pk=pk, then=Value(hot_age_offset(created_at))) for pk, created_at in rows),
+        output_field=FloatField(),
+    )
+
+
+def hot_score_expression(age_offset, like_count=F("like_count"), comment_count=F("comment_count")):
+    """
+    ``hot_score`` recomputed from ``age_offset`` and the counters: the row's
+    own, or the values an UPDATE is setting them to.
+    """
+    return _log10_engagement(like_count, comment_count) + age_offset
+
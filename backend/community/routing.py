@@ -0,0 +1,123 @@
+"""
+Read-replica routing.
+
+Only views marked with ``@replica_reads`` read from a replica, and only for
+GET/HEAD requests from clients that have not written recently; everything
+else (writes, the reads inside write views, management commands) uses
+``default``. A successful write pins the client, identified by its
+credentials, to the primary for REPLICA_PIN_SECONDS so it reads its own
+likes and comments back despite replication lag.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.decorators import sync_and_async_middleware
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_use_replica = ContextVar("community_use_replica", default=False)
+
+
+def replica_reads(view):
+    """Let ``view`` (applied outside ``@api_view``) read from replicas."""
+    view.replica_reads = True
+    return view
+
+
+def _client_key(request):
+    credentials = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    return "community:pin:" + hashlib.sha1(credentials.encode()).hexdigest()
+
+
+@sync_and_async_middleware
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Hooks are called as they are found; a sync one would take a thread
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.set(False)
+
+        key = self._pin_key(request, response)
+        if key:
+            cache.set(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_replica.set(False)
+
+        key = self._pin_key(request, response)
+        if key:
+            await cache.aset(key, True, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def _pin_key(self, request, response):
+        # Cache key to pin the client with after a successful write
+        key = _client_key(request)
+        if (
+            key
+            and settings.READ_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            return key
+        return None
+
+    def _routes_to_replica(self, request, view_func):
+        return (
+            settings.READ_REPLICAS
+            and getattr(view_func, "replica_reads", False)
+            and request.method in SAFE_METHODS
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self._routes_to_replica(request, view_func):
+            return None
+        key = _client_key(request)
+        _use_replica.set(key is None or not cache.get(key))
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if not self._routes_to_replica(request, view_func):
+            return None
+        key = _client_key(request)
+        _use_replica.set(key is None or not await cache.aget(key))
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and settings.READ_REPLICAS:
+            return random.choice(settings.READ_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by replication from the primary
+        return db == "default"
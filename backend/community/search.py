@@ -0,0 +1,222 @@
+"""
+Full-text search over posts and comments.
+
+Both tables are indexed under one key space: post ``id`` is key ``2 * id``
+and comment ``id`` is ``2 * id + 1``. On SQLite the index is the FTS5 table
+``community_search`` (contentless, porter-stemmed, rowid = key) kept in
+sync by triggers; on PostgreSQL each table has a generated ``search_vector``
+tsvector column with a GIN index. ``index_schema`` has the DDL for
+both; migration 0010 applies it.
+
+Rebuilding community_post or community_comment on SQLite (some
+migrations copy the table and swap it in) drops its triggers. Run the
+``rebuild_search_index`` command after such a migration.
+
+Hits are ranked by relevance (bm25 on SQLite, ts_rank_cd on PostgreSQL),
+best first, ties broken by key, and paged with a ``(score, key)`` cursor.
+Ranking has to score every candidate, so only the newest
+SEARCH_MAX_CANDIDATES matches of each kind are ranked: a rare word ranks
+all of its matches, a word in every other post stays a bounded scan.
+"""
+import re
+
+from django.conf import settings
+from django.db import NotSupportedError, connections, router
+
+from .models import Comment, Post
+from .pagination import decode_values, encode_values
+
+KINDS = ("post", "comment")
+# Index key expression per table
+KEYS = {"post": "id * 2", "comment": "id * 2 + 1"}
+
+# Per kind: the newest SEARCH_MAX_CANDIDATES matches, with their scores.
+# Both backends produce matches in key order without ranking them first
+_SQLITE_HITS = """
+    SELECT * FROM (
+        SELECT rowid AS key, -bm25(community_search) AS score
+        FROM community_search
+        WHERE community_search MATCH %s AND rowid %% 2 = {kind}
+        ORDER BY rowid DESC LIMIT %s
+    )
+"""
+
+_POSTGRES_HITS = """
+    SELECT * FROM (
+        SELECT {key} AS key, ts_rank_cd(search_vector, q)::float8 AS score
+        FROM community_{table}, websearch_to_tsquery('english', %s) AS q
+        WHERE search_vector @@ q
+        ORDER BY id DESC LIMIT %s
+    ) AS {table}_hits
+"""
+
+
+def _sqlite_schema():
+    create = [
+        """
+        CREATE VIRTUAL TABLE community_search USING fts5(
+            body, content='', tokenize='porter unicode61'
+        )
+        """,
+    ]
+    drop = []
+    for table, key in KEYS.items():
+        create += [
+            f"""
+            INSERT INTO community_search(rowid, body)
+            SELECT {key}, content FROM community_{table}
+            """,
+            f"""
+            CREATE TRIGGER community_{table}_search_insert
+            AFTER INSERT ON community_{table} BEGIN
+                INSERT INTO community_search(rowid, body)
+                VALUES (new.{key}, new.content);
+            END
+            """,
+            # Contentless rows are removed with the 'delete' command and the
+            # text that was indexed, which triggers have as old.content
+            f"""
+            CREATE TRIGGER community_{table}_search_delete
+            AFTER DELETE ON community_{table} BEGIN
+                INSERT INTO community_search(community_search, rowid, body)
+                VALUES ('delete', old.{key}, old.content);
+            END
+            """,
+            f"""
+            CREATE TRIGGER community_{table}_search_update
+            AFTER UPDATE OF content ON community_{table} BEGIN
+                INSERT INTO community_search(community_search, rowid, body)
+                VALUES ('delete', old.{key}, old.content);
+                INSERT INTO community_search(rowid, body)
+                VALUES (new.{key}, new.content);
+            END
+            """,
+        ]
+        drop += [
+            f"DROP TRIGGER IF EXISTS community_{table}_search_{event}"
+            for event in ("insert", "delete", "update")
+        ]
+    drop.append("DROP TABLE IF EXISTS community_search")
+    return create, drop
+
+
+def _postgres_schema():
+    create = []
+    drop = []
+    for table in KEYS:
+        create += [
+            f"""
+            ALTER TABLE community_{table} ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+            """,
+            f"""
+            CREATE INDEX community_{table}_search_idx
+            ON community_{table} USING GIN (search_vector)
+            """,
+        ]
+        # The index goes with the column
+        drop.append(f"ALTER TABLE community_{table} DROP COLUMN IF EXISTS search_vector")
+    return create, drop
+
+
+def index_schema(vendor):
+    """
+    ``(create, drop)`` SQL statement lists for the search index on
+    ``vendor``; ``create`` also indexes the existing rows. Both are empty
+    for databases without search support.
+    """
+    if vendor == "sqlite":
+        return _sqlite_schema()
+    if vendor == "postgresql":
+        return _postgres_schema()
+    return [], []
+
+
+def _fts5_query(text):
+    # Every word must match; quoting keeps FTS5 syntax out of user input
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", text))
+
+
+def _hits_sql(vendor, query, kinds):
+    limit = settings.SEARCH_MAX_CANDIDATES
+    if vendor == "sqlite":
+        template, query = _SQLITE_HITS, _fts5_query(query)
+    elif vendor == "postgresql":
+        template = _POSTGRES_HITS
+    else:
+        raise NotSupportedError(f"Search is not available on {vendor}")
+    sql = " UNION ALL ".join(
+        template.format(kind=KINDS.index(kind), key=KEYS[kind], table=kind)
+        for kind in kinds
+    )
+    return sql, [query, limit] * len(kinds)
+
+
+def search_keys(query, kinds=KINDS, cursor=None, page_size=None):
+    """``([(key, score)], next_cursor)`` for one page of hits, best first."""
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    connection = connections[router.db_for_read(Post)]
+    hits_sql, params = _hits_sql(connection.vendor, query, kinds)
+
+    sql = f"SELECT key, score FROM ({hits_sql}) AS hits"
+    if cursor:
+        score, key = decode_values(cursor, (float, int))
+        sql += " WHERE score < %s OR (score = %s AND key > %s)"
+        params += [score, score, key]
+    sql += " ORDER BY score DESC, key LIMIT %s"
+    params.append(page_size + 1)
+
+    with connection.cursor() as db:
+        db.execute(sql, params)
+        rows = db.fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_values(rows[-1][::-1])
+    return rows, next_cursor
+
+
+def search(query, kinds=KINDS, cursor=None, page_size=None):
+    """
+    ``(results, next_cursor)``: one page of matching posts and comments,
+    hydrated with one query per kind.
+    """
+    if not _fts5_query(query):
+        raise ValueError("q must contain at least one word")
+    rows, next_cursor = search_keys(query, kinds, cursor, page_size)
+
+    ids = {"post": [], "comment": []}
+    for key, _ in rows:
+        ids[KINDS[key % 2]].append(key // 2)
+    fields = ("id", "author_id", "author__username", "content", "created_at")
+    found = {
+        "post": {
+            row["id"]: {**row, "post_id": row["id"]}
+            for row in Post.objects.filter(id__in=ids["post"]).values(*fields)
+        } if ids["post"] else {},
+        "comment": {
+            row["id"]: row
+            for row in Comment.objects.filter(id__in=ids["comment"])
+            .values(*fields, "post_id")
+        } if ids["comment"] else {},
+    }
+
+    results = []
+    for key, score in rows:
+        kind = KINDS[key % 2]
+        row = found[kind].get(key // 2)
+        if row is None:
+            # Deleted between the search and the lookup
+            continue
+        results.append({
+            "type": kind,
+            "id": row["id"],
+            "post_id": row["post_id"],
+            "author": {"id": row["author_id"], "username": row["author__username"]},
+            "content": row["content"],
+            "created_at": row["created_at"],
+            "score": score,
+        })
+    return results, next_cursor
+
@@ -0,0 +1,263 @@
+"""
+Deterministic synthetic community for benchmarks and query-budget tests.
+
+Attention is skewed the way real feeds are: posts draw comments and likes
+from a Zipf distribution (a few huge threads, a long tail of quiet ones),
+and within a thread each reply picks its parent by preferential
+attachment, so busy comments attract more replies. Everything is written
+with bulk inserts and the denormalized counters, materialized paths and
+karma rollup are filled in directly, so the result is indistinguishable
+from data written through the API.
+"""
+import io
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from .karma import COMMENT_LIKE_POINTS, POST_LIKE_POINTS
+from .models import (
+    Comment, Follow, FollowerCount, KarmaTransaction, Like, Post, path_segment,
+)
+from .ranking import hot_score
+from .timeline import fan_out
+
+SEED_PASSWORD = "seed-password"
+USERNAME_PREFIX = "seed-user-"
+
+
+class _Node:
+    __slots__ = (
+        "post", "parent", "depth", "author", "created_at", "replies", "likes", "obj",
+    )
+
+    def __init__(self, post, parent, author):
+        self.post = post
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.author = author
+        self.created_at = None
+        self.replies = 0
+        self.likes = 0
+        self.obj = None
+
+
+def _zipf_weights(n, alpha):
+    return [1 / (rank ** alpha) for rank in range(1, n + 1)]
+
+
+def _thread(rng, post, size, users, max_depth, top_level_ratio):
+    # Preferential attachment: every comment sits in the urn once, plus
+    # once per reply it has received
+    nodes = []
+    urn = []
+    for _ in range(size):
+        parent = rng.choice(urn) if urn and rng.random() > top_level_ratio else None
+        if parent is not None and parent.depth + 1 >= max_depth:
+            parent = None
+        node = _Node(post, parent, rng.choice(users))
+        nodes.append(node)
+        urn.append(node)
+        if parent is not None:
+            parent.replies += 1
+            urn.append(parent)
+    return nodes
+
+
+@contextmanager
+def _historic_timestamps(*models):
+    # Let bulk_create keep the created_at we set instead of auto_now_add's
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def seed_community(
+    users=50,
+    posts=200,
+    comments=2000,
+    likes=5000,
+    follows=500,
+    alpha=1.1,
+    max_depth=8,
+    top_level_ratio=0.3,
+    span=timedelta(days=2),
+    seed=0,
+    batch_size=1000,
+):
+    """
+    Create the community in one transaction and return the counts written.
+
+    ``alpha`` is the Zipf exponent for how comments and likes spread over
+    posts and follows over users; ``span`` is how far back the content is dated. Same arguments,
+    same dataset.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    # Plan everything in memory first, so rows are inserted with their
+    # final counters and timestamps
+    user_offset = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+    user_objs = [
+        User(username=f"{USERNAME_PREFIX}{user_offset + i}") for i in range(users)
+    ]
+
+    post_objs = []
+    for i in range(posts):
+        created = now - span + span * i / posts
+        post_objs.append(Post(
+            author=rng.choice(user_objs),
+            content=f"Seed post {i}",
+            created_at=created,
+            last_activity_at=created,
+        ))
+    popularity = post_objs[:]
+    rng.shuffle(popularity)
+    weights = _zipf_weights(len(popularity), alpha)
+
+    sizes = defaultdict(int)
+    for post in rng.choices(popularity, weights, k=comments) if posts else ():
+        sizes[id(post)] += 1
+    threads = {}
+    nodes = []
+    for post in post_objs:
+        thread = threads[id(post)] = _thread(
+            rng, post, sizes[id(post)], user_objs, max_depth, top_level_ratio
+        )
+        for k, node in enumerate(thread):
+            node.created_at = (
+                post.created_at
+                + (now - post.created_at) * (k + 1) / (len(thread) + 1)
+            )
+        post.comment_count = len(thread)
+        post.reply_count = sum(1 for node in thread if node.parent is None)
+        nodes.extend(thread)
+
+    # Likes: popular posts and their threads collect most of them
+    planned = set()
+    like_plan = []
+    attempts = 0
+    while len(like_plan) < likes and attempts < likes * 10 and posts:
+        attempts += 1
+        post = rng.choices(popularity, weights)[0]
+        thread = threads[id(post)]
+        target = rng.choice(thread) if thread and rng.random() < 0.5 else post
+        user = rng.choice(user_objs)
+        if (id(user), id(target)) in planned:
+            continue
+        planned.add((id(user), id(target)))
+        created = target.created_at + (now - target.created_at) * rng.random()
+        like_plan.append((user, target, created))
+        if isinstance(target, Post):
+            target.like_count += 1
+        else:
+            target.likes += 1
+
+    # Follows: a few popular users collect most followers
+    follow_plan = {}
+    user_weights = _zipf_weights(users, alpha)
+    attempts = 0
+    while len(follow_plan) < follows and attempts < follows * 10 and users > 1:
+        attempts += 1
+        follower = rng.randrange(users)
+        followee = rng.choices(range(users), user_weights)[0]
+        if follower != followee:
+            follow_plan[follower, followee] = None
+
+    with transaction.atomic(), _historic_timestamps(
+        Post, Comment, Like, KarmaTransaction
+    ):
+        password = make_password(SEED_PASSWORD)
+        for user in user_objs:
+            user.password = password
+        User.objects.bulk_create(user_objs, batch_size=batch_size)
+        for post in post_objs:
+            post.author_id = post.author.id
+            post.hot_score = hot_score(post.like_count, post.comment_count, post.created_at)
+        Post.objects.bulk_create(post_objs, batch_size=batch_size)
+
+        # Level by level: children need their parent's id and path, and a
+        # path ends with the comment's own id, so it is set after insert
+        by_depth = defaultdict(list)
+        for node in nodes:
+            by_depth[node.depth].append(node)
+        for depth in sorted(by_depth):
+            level = by_depth[depth]
+            for node in level:
+                node.obj = Comment(
+                    post_id=node.post.id,
+                    parent_id=node.parent.obj.id if node.parent else None,
+                    author_id=node.author.id,
+                    content=f"Seed comment at depth {depth}",
+                    created_at=node.created_at,
+                    like_count=node.likes,
+                    reply_count=node.replies,
+                    depth=depth,
+                )
+            Comment.objects.bulk_create(
+                [node.obj for node in level], batch_size=batch_size
+            )
+            for node in level:
+                parent_path = node.parent.obj.path if node.parent else ""
+                node.obj.path = parent_path + path_segment(node.obj.id)
+            Comment.objects.bulk_update(
+                [node.obj for node in level], ["path"], batch_size=batch_size
+            )
+
+        like_objs = []
+        karma = []
+        for user, target, created in like_plan:
+            if isinstance(target, Post):
+                like = Like(user_id=user.id, post_id=target.id, created_at=created)
+                karma.append(KarmaTransaction(
+                    user_id=target.author_id, points=POST_LIKE_POINTS, created_at=created
+                ))
+            else:
+                like = Like(user_id=user.id, comment_id=target.obj.id, created_at=created)
+                karma.append(KarmaTransaction(
+                    user_id=target.author.id, points=COMMENT_LIKE_POINTS, created_at=created
+                ))
+            like_objs.append(like)
+        Like.objects.bulk_create(like_objs, batch_size=batch_size)
+        KarmaTransaction.objects.bulk_create(karma, batch_size=batch_size)
+        call_command("backfill_karma_rollup", stdout=io.StringIO())
+
+        Follow.objects.bulk_create(
+            [
+                Follow(
+                    follower_id=user_objs[follower].id,
+                    followee_id=user_objs[followee].id,
+                )
+                for follower, followee in follow_plan
+            ],
+            batch_size=batch_size,
+        )
+        followers = defaultdict(int)
+        for _, followee in follow_plan:
+            followers[user_objs[followee].id] += 1
+        FollowerCount.objects.bulk_create(
+            [FollowerCount(user_id=user_id, count=n) for user_id, n in followers.items()],
+            batch_size=batch_size,
+        )
+        # After the follows, so timelines come out as if written live
+        for post in post_objs:
+            fan_out(post)
+
+    return {
+        "users": len(user_objs),
+        "posts": len(post_objs),
+        "comments": len(nodes),
+        "likes": len(like_objs),
+        "follows": len(follow_plan),
+    }
@@ -1,6 +1,10 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from .fastpath import post_payloads
+from .instrumentation import timed
 from .models import Post, Comment, Like
+from .tree import attach_comment_previews, build_comment_trees
 
 
 # ---------- USER ----------
@@ -15,6 +19,8 @@ class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     like_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
+    reply_count = serializers.IntegerField(read_only=True)
+    has_more = serializers.SerializerMethodField()
     children = serializers.SerializerMethodField()
 
     class Meta:
@@ -26,12 +32,21 @@ class CommentSerializer(serializers.ModelSerializer):
             "created_at",
             "like_count",
             "is_liked",
+            "reply_count",
+            "has_more",
             "children",
         ]
 
+    def get_has_more(self, obj):
+        # True where a depth/children limit cut this node's replies short
+        children = getattr(obj, "tree_children", None)
+        return children is not None and obj.reply_count > len(children)
+
     def get_children(self, obj):
-        # Recursive serialization
-        children = obj.children.all().order_by("created_at")
+        # Recursive serialization over the tree linked by build_comment_trees
+        children = getattr(obj, "tree_children", None)
+        if children is None:
+            children = obj.children.all().order_by("created_at")
         return CommentSerializer(
             children,
             many=True,
@@ -39,6 +54,10 @@ class CommentSerializer(serializers.ModelSerializer):
         ).data
 
     def get_is_liked(self, obj):
+        viewer_state = self.context.get("viewer_state")
+        if viewer_state is not None:
+            return viewer_state.comment_liked(obj.id)
+
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return False
@@ -49,12 +68,28 @@ class CommentSerializer(serializers.ModelSerializer):
         ).exists()
 
 
+# ---------- COMMENT (PREVIEW, NO CHILDREN) ----------
+class CommentPreviewSerializer(CommentSerializer):
+    class Meta(CommentSerializer.Meta):
+        fields = [
+            "id",
+            "author",
+            "content",
+            "created_at",
+            "like_count",
+            "is_liked",
+            "reply_count",
+        ]
+
+
 # ---------- POST ----------
 class PostSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     comment_count = serializers.IntegerField(read_only=True)
     like_count = serializers.IntegerField(read_only=True)
     is_liked = serializers.SerializerMethodField()
+    reply_count = serializers.IntegerField(read_only=True)
+    has_more = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField()
 
     class Meta:
@@ -67,12 +102,20 @@ class PostSerializer(serializers.ModelSerializer):
             "comment_count",
             "like_count",
             "is_liked",
+            "reply_count",
+            "has_more",
             "comments",
         ]
 
+    def get_has_more(self, obj):
+        tree = getattr(obj, "comment_tree", None)
+        return tree is not None and obj.reply_count > len(tree)
+
     def get_comments(self, obj):
-        # Only top-level comments
-        comments = obj.comments.filter(parent__isnull=True).order_by("created_at")
+        # Only top-level comments; the whole tree is loaded in one query
+        if not hasattr(obj, "comment_tree"):
+            build_comment_trees([obj])
+        comments = obj.comment_tree
         return CommentSerializer(
             comments,
             many=True,
@@ -80,6 +123,10 @@ class PostSerializer(serializers.ModelSerializer):
         ).data
 
     def get_is_liked(self, obj):
+        viewer_state = self.context.get("viewer_state")
+        if viewer_state is not None:
+            return viewer_state.post_liked(obj.id)
+
         request = self.context.get("request")
         if not request or not request.user.is_authenticated:
             return False
@@ -88,3 +135,46 @@ class PostSerializer(serializers.ModelSerializer):
             user=request.user,
             post=obj
         ).exists()
+
+
+# ---------- POST (FEED SUMMARY) ----------
+class PostSummarySerializer(PostSerializer):
+    def get_has_more(self, obj):
+        preview = getattr(obj, "comment_preview", None)
+        return preview is not None and obj.reply_count > len(preview)
+
+    def get_comments(self, obj):
+        # First FEED_SUMMARY_COMMENTS top-level comments, no subtrees
+        if not hasattr(obj, "comment_preview"):
+            attach_comment_previews([obj], settings.FEED_SUMMARY_COMMENTS)
+        return CommentPreviewSerializer(
+            obj.comment_preview,
+            many=True,
+            context=self.context
+        ).data
+
+
+@timed("serialize")
+def build_post_payloads(post_ids, view, max_depth=None, max_children=None):
+    """
+    Viewer-independent ``{post_id: payload}`` for the "full" or "summary"
+    representation (``is_liked`` is always False; see ViewerState.apply).
+    ``max_depth``/``max_children`` limit the "full" comment trees.
+    """
+    if settings.FEED_FAST_SERIALIZER:
+        return post_payloads(
+            post_ids,
+            view,
+            settings.FEED_SUMMARY_COMMENTS,
+            max_depth=max_depth,
+            max_children=max_children,
+        )
+
+    posts = list(Post.objects.select_related("author").filter(id__in=post_ids))
+    if view == "summary":
+        attach_comment_previews(posts, settings.FEED_SUMMARY_COMMENTS)
+        serializer_class = PostSummarySerializer
+    else:
+        build_comment_trees(posts, max_depth, max_children)
+        serializer_class = PostSerializer
+    return {post["id"]: post for post in serializer_class(posts, many=True).data}
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .instrumentation import instrument_connection
+from .models import Comment, Post
+
+
+# The write views bump Post.version themselves; deletes (admin, cascades)
+# land here so cached payloads and ETags of the parent post are retired
+@receiver(post_delete, sender=Comment)
+def touch_post_of_deleted_comment(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).touch()
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    # RequestMetricsMiddleware's per-request query counts and db timings
+    instrument_connection(connection)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    # Per-connection PRAGMAs from settings.SQLITE_PRAGMAS (WAL, mmap, ...)
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+# Cached token lookups (CachedTokenAuthentication): a deleted token must
+# stop working, and a saved user (deactivated, renamed) must be re-read
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.evict(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_saved_user(sender, instance, **kwargs):
+    token_cache.evict_user(instance.pk)
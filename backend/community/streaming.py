@@ -0,0 +1,154 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .fastpath import COMMENT_FIELDS, comment_payload, post_payloads
+from .models import Comment
+from .serializers import build_post_payloads
+from .tree import comments_for_trees
+from .viewer import ViewerState
+
+def _render(data):
+    return JSONRenderer().render(data)
+
+
+def _render_open(payload, key):
+    # Payloads end with their list key, so drop the closing brace and open it
+    return _render(payload)[:-1] + f',"{key}":['.encode()
+
+
+def json_stream_response(chunks):
+    return StreamingHttpResponse(chunks, content_type="application/json")
+
+
+_DONE = object()
+
+
+async def _pull(chunks):
+    # One chunk per hop to the sync thread, which keeps the ORM cursor on
+    # a single connection
+    while True:
+        chunk = await sync_to_async(next)(chunks, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+def async_stream_response(response):
+    """
+    ``response`` for the ASGI handler. A stream over a sync iterator is
+    switched to an async one that builds each chunk in a thread, so it is
+    sent as it is produced rather than collected in memory first. Other
+    responses are returned as they are.
+    """
+    if response.streaming and not response.is_async:
+        # The sync iterator stays registered for response.close()
+        response.streaming_content = _pull(iter(response.streaming_content))
+    return response
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_posts(queryset, user, view, chunk_size, max_depth=None, max_children=None):
+    """
+    ``{"results": [...], "next_cursor": null}`` for every post in
+    ``queryset``, walked with ``.iterator()`` and serialized ``chunk_size``
+    posts at a time, each with its comment tree cut to ``max_depth`` and
+    ``max_children``, so memory is bounded by one chunk.
+    """
+    yield b'{"results":['
+    first = True
+    post_ids = queryset.values_list("id", flat=True).iterator(chunk_size=chunk_size)
+    for ids in _chunks(post_ids, chunk_size):
+        built = build_post_payloads(ids, view, max_depth, max_children)
+        payloads = [built[post_id] for post_id in ids if post_id in built]
+        ViewerState.for_payloads(user, payloads).apply(payloads)
+        for payload in payloads:
+            yield _render(payload) if first else b"," + _render(payload)
+            first = False
+    yield b'],"next_cursor":null}'
+
+
+def _has_more(reply_count, depth, max_depth, max_children):
+    # Whether the limits leave out some of the replies at ``depth``, as
+    # post_payloads counts them
+    if max_depth is not None and depth >= max_depth:
+        return reply_count > 0
+    return max_children is not None and reply_count > max_children
+
+
+def stream_post_detail(post_id, user, chunk_size, max_depth=None, max_children=None):
+    """
+    One post with its comment tree, cut to ``max_depth`` and
+    ``max_children`` like the buffered detail, emitted incrementally.
+
+    Comments are walked once in materialized-path order, which is the
+    tree's depth-first display order, so only the chain of currently open
+    ancestors is held in memory (with a ``max_children`` limit, the rows
+    the level-by-level walk keeps). The viewer's likes are resolved per
+    chunk.
+
+    The post itself is read here, before any chunk is sent, so a post that
+    is gone raises Http404 while a 404 can still be returned.
+    """
+    post = post_payloads([post_id], "summary").get(post_id)
+    if post is None:
+        raise Http404
+    del post["comments"]
+    post["has_more"] = _has_more(post["reply_count"], 0, max_depth, max_children)
+    post["is_liked"] = ViewerState(user, post_ids=[post_id]).post_liked(post_id)
+    return _stream_comments(post, user, chunk_size, max_depth, max_children)
+
+
+def _comment_rows(post_id, chunk_size, max_depth, max_children):
+    fields = (*COMMENT_FIELDS, "depth")
+    if max_children is not None:
+        return comments_for_trees(
+            [post_id], max_depth, max_children,
+            select=lambda qs: qs.values(*fields, "path"),
+        )
+    rows = Comment.objects.filter(post_id=post_id)
+    if max_depth is not None:
+        rows = rows.filter(depth__lt=max_depth)
+    return rows.order_by("path").values(*fields).iterator(chunk_size=chunk_size)
+
+
+def _stream_comments(post, user, chunk_size, max_depth, max_children):
+    post_id = post["id"]
+    yield _render_open(post, "comments")
+
+    rows = _comment_rows(post_id, chunk_size, max_depth, max_children)
+    open_depths = []
+    for chunk in _chunks(rows, chunk_size):
+        viewer = ViewerState(user, comment_ids=[row["id"] for row in chunk])
+        out = []
+        for row in chunk:
+            # Close the previous comment and any deeper ones still open; if
+            # the last closed one sits at our depth it is our previous sibling
+            closed = None
+            while open_depths and open_depths[-1] >= row["depth"]:
+                closed = open_depths.pop()
+                out.append(b"]}")
+            if closed == row["depth"]:
+                out.append(b",")
+
+            comment = comment_payload(row)
+            del comment["children"]
+            comment["has_more"] = _has_more(
+                row["reply_count"], row["depth"] + 1, max_depth, max_children
+            )
+            comment["is_liked"] = viewer.comment_liked(row["id"])
+            out.append(_render_open(comment, "children"))
+            open_depths.append(row["depth"])
+        yield b"".join(out)
+
+    yield b"]}" * len(open_depths) + b"]}"
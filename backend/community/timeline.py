@@ -0,0 +1,240 @@
+"""
+Materialized home timelines.
+
+``create_post`` fans each new post out to its author's followers as
+TimelineEntry rows. Authors with more than TIMELINE_FANOUT_MAX_FOLLOWERS
+followers are skipped (one post would mean that many inserts); their
+posts are merged in when a follower reads instead, and keep being merged
+after the author drops back under the limit, since the posts written
+while over it were never fanned out. A home page is then one
+range scan on ``timeline_page_idx``, one lookup of followed high-follower
+authors and, only if there are any, one scan of their posts; the post ids
+are hydrated in a batch like any other feed page.
+
+Timelines are bounded by ``trim_timelines`` (the command of the same
+name), which keeps the newest TIMELINE_MAX_ENTRIES of each; trimming is
+periodic rather than per post so fan-out stays a single insert. Posts
+written before timelines existed are fanned out once by
+``backfill_timelines``.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, When, Window
+from django.db.models.functions import RowNumber
+
+from .models import Follow, FollowerCount, Post, TimelineEntry
+from .pagination import encode_values, keyset_filter
+
+TIMELINE_ORDERING = ("-created_at", "-post_id")
+POST_ORDERING = ("-created_at", "-id")
+
+
+def _is_fanout_author(count):
+    return count <= settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out(post):
+    """
+    Add ``post`` to its author's timeline and, unless the author has too
+    many followers, to every follower's. Returns the number of timelines.
+    """
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    followers = list(
+        Follow.objects
+        .filter(followee_id=post.author_id)
+        .values_list("follower_id", flat=True)[:limit + 1]
+    )
+    if not _is_fanout_author(len(followers)):
+        followers = []
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post.id, created_at=post.created_at)
+            for user_id in [post.author_id, *followers]
+        ],
+        ignore_conflicts=True,
+    )
+    return len(followers) + 1
+
+
+def _adjust_follower_count(user_id, delta):
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    updates = {
+        "count": F("count") + delta,
+        "merged_on_read": Case(
+            When(count__gt=limit - delta, then=True), default=F("merged_on_read")
+        ),
+    }
+    if FollowerCount.objects.filter(user_id=user_id).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            count = max(delta, 0)
+            FollowerCount.objects.create(
+                user_id=user_id, count=count, merged_on_read=count > limit
+            )
+    except IntegrityError:
+        # Another writer created the row first
+        FollowerCount.objects.filter(user_id=user_id).update(**updates)
+
+
+def follow(follower, followee):
+    """
+    Start ``follower`` following ``followee`` and backfill their timeline
+    with the followee's latest posts. False if already following.
+    """
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                Follow.objects.create(follower=follower, followee=followee)
+        except IntegrityError:
+            return False
+        _adjust_follower_count(followee.id, 1)
+
+        count = (
+            FollowerCount.objects
+            .filter(user_id=followee.id)
+            .values_list("count", flat=True)
+            .first()
+        )
+        if _is_fanout_author(count or 0):
+            recent = (
+                Post.objects
+                .filter(author_id=followee.id)
+                .order_by(*POST_ORDERING)
+                .values_list("id", "created_at")[:settings.TIMELINE_BACKFILL]
+            )
+            TimelineEntry.objects.bulk_create(
+                [
+                    TimelineEntry(user_id=follower.id, post_id=post_id, created_at=created_at)
+                    for post_id, created_at in recent
+                ],
+                ignore_conflicts=True,
+            )
+    return True
+
+
+def unfollow(follower, followee):
+    """Stop following and drop the followee's posts from the timeline."""
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            follower=follower, followee=followee
+        ).delete()
+        if not deleted:
+            return False
+        _adjust_follower_count(followee.id, -1)
+        TimelineEntry.objects.filter(
+            user_id=follower.id,
+            post__in=Post.objects.filter(author_id=followee.id).values("id"),
+        ).delete()
+    return True
+
+
+def followed_fanout_on_read_authors(user):
+    """
+    Ids of the authors ``user`` follows whose posts are not, or were not
+    always, fanned out.
+    """
+    return list(
+        Follow.objects
+        .filter(
+            Q(followee__follower_count__count__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS)
+            | Q(followee__follower_count__merged_on_read=True),
+            follower_id=user.id,
+        )
+        .values_list("followee_id", flat=True)
+    )
+
+
+def home_page(user, cursor=None, page_size=None):
+    """
+    ``(post_ids, next_cursor)`` for one page of ``user``'s home timeline,
+    newest first: materialized entries merged with the posts of followed
+    fan-out-on-read authors.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    # Both sources order by the post's (created_at, id), so one cursor
+    # positions both
+    rows = list(
+        keyset_filter(
+            TimelineEntry.objects.filter(user_id=user.id).order_by(*TIMELINE_ORDERING),
+            TIMELINE_ORDERING,
+            cursor,
+        ).values_list("created_at", "post_id")[:page_size + 1]
+    )
+
+    authors = followed_fanout_on_read_authors(user)
+    if authors:
+        rows += keyset_filter(
+            Post.objects.filter(author_id__in=authors).order_by(*POST_ORDERING),
+            POST_ORDERING,
+            cursor,
+        ).values_list("created_at", "id")[:page_size + 1]
+        # Posts fanned out before their author crossed the threshold
+        # come from both sources
+        rows = sorted(set(rows), reverse=True)
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_values(rows[-1])
+    return [post_id for _, post_id in rows], next_cursor
+
+
+def backfill_timelines(batch_size=1000):
+    """
+    Fan out every existing post as ``create_post`` does now, ``batch_size``
+    posts at a time, against the current follow graph. Entries that exist
+    are skipped, so it can be rerun. Returns the number of posts.
+    """
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    posts = Post.objects.order_by("id").values_list("id", "author_id", "created_at")
+    done = 0
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return done
+        last_id = batch[-1][0]
+        authors = {author_id for _, author_id, _ in batch}
+        authors -= set(
+            FollowerCount.objects
+            .filter(user_id__in=authors, count__gt=limit)
+            .values_list("user_id", flat=True)
+        )
+        followers = defaultdict(list)
+        for follower_id, followee_id in (
+            Follow.objects
+            .filter(followee_id__in=authors)
+            .values_list("follower_id", "followee_id")
+        ):
+            followers[followee_id].append(follower_id)
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+                for post_id, author_id, created_at in batch
+                for user_id in [author_id, *followers[author_id]]
+            ],
+            ignore_conflicts=True,
+            batch_size=batch_size,
+        )
+        done += len(batch)
+
+
+def trim_timelines(batch_size=1000):
+    """Delete entries beyond the newest TIMELINE_MAX_ENTRIES of each timeline."""
+    ranked = TimelineEntry.objects.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F("user_id")],
+            order_by=[F("created_at").desc(), F("post_id").desc()],
+        )
+    ).filter(position__gt=settings.TIMELINE_MAX_ENTRIES)
+
+    deleted = 0
+    while True:
+        ids = list(ranked.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += TimelineEntry.objects.filter(id__in=ids).delete()[0]
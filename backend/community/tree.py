@@ -0,0 +1,144 @@
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+
+def _first_per_parent(qs, limit):
+    return qs.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F("post_id"), F("parent_id")],
+            order_by=[F("id").asc()],
+        ),
+    ).filter(position__lte=limit)
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _id_chunks(ids, reserved, using):
+    # Slices of ``ids`` that fit one query with ``reserved`` other
+    # parameters, under the backend's limit (999 on SQLite)
+    limit = connections[using].features.max_query_params
+    size = len(ids) if limit is None else limit - reserved
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def comments_for_trees(post_ids, max_depth=None, max_children=None, select=None):
+    """
+    The comments to render for ``post_ids``, in display order (``path``),
+    as the rows ``select(queryset)`` fetches (model instances by default).
+
+    Depth alone is a filter on the denormalized ``depth`` column, one
+    query. A ``max_children`` limit walks the trees a level at a time, one
+    range scan on ``comment_children_idx`` per level, keeping the first
+    ``max_children`` replies of every parent. A level's parents are bound
+    in slices that fit the backend's parameter limit, so however large a
+    thread gets no query is sent an unbounded id list.
+    """
+    if max_depth == 0:
+        return []
+    select = select or (lambda qs: qs)
+    if max_children is None:
+        qs = Comment.objects.filter(post_id__in=post_ids)
+        if max_depth is not None:
+            qs = qs.filter(depth__lt=max_depth)
+        return list(select(qs.order_by("path")))
+
+    roots = Comment.objects.filter(post_id__in=post_ids, parent__isnull=True)
+    rows = []
+    level = list(select(_first_per_parent(roots, max_children)))
+    depth = 0
+    while level:
+        rows.extend(level)
+        depth += 1
+        if max_depth is not None and depth >= max_depth:
+            break
+        parent_ids = [_row_value(row, "id") for row in level]
+        level = []
+        # Post ids and the window limit are bound too
+        for chunk in _id_chunks(parent_ids, len(post_ids) + 1, roots.db):
+            level.extend(select(_first_per_parent(
+                Comment.objects.filter(post_id__in=post_ids, parent_id__in=chunk),
+                max_children,
+            )))
+    rows.sort(key=lambda row: _row_value(row, "path"))
+    return rows
+
+
+def build_comment_trees(posts, max_depth=None, max_children=None):
+    """
+    Load the comments of ``posts`` and link them in memory.
+
+    Each post gets a ``comment_tree`` list of its top-level comments and
+    each comment a ``tree_children`` list, both in display order. Rows
+    arrive ordered by materialized path, so every parent is linked before
+    its replies. Like counts are denormalized on the row, so serializing
+    the tree issues no further queries (the viewer's likes come from
+    ``ViewerState``). Unlimited or depth-limited trees take one query; a
+    ``max_children`` limit adds one per level, and ``reply_count`` tells
+    truncated nodes apart.
+    """
+    posts = list(posts)
+    by_post = {post.id: post for post in posts}
+    for post in posts:
+        post.comment_tree = []
+
+    if not by_post:
+        return posts
+
+    comments = comments_for_trees(
+        list(by_post),
+        max_depth,
+        max_children,
+        select=lambda qs: qs.select_related("author"),
+    )
+    by_id = {comment.id: comment for comment in comments}
+    for comment in comments:
+        comment.tree_children = []
+
+    for comment in comments:
+        if comment.parent_id is None:
+            by_post[comment.post_id].comment_tree.append(comment)
+        else:
+            by_id[comment.parent_id].tree_children.append(comment)
+
+    return posts
+
+
+def attach_comment_previews(posts, limit):
+    """
+    Attach the first ``limit`` top-level comments of each post as
+    ``comment_preview``, using one windowed query for all ``posts``.
+    """
+    posts = list(posts)
+    by_post = {post.id: post for post in posts}
+    for post in posts:
+        post.comment_preview = []
+
+    if not by_post or limit <= 0:
+        return posts
+
+    qs = (
+        Comment.objects
+        .filter(post_id__in=by_post, parent__isnull=True)
+        .select_related("author")
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F("post_id")],
+                order_by=[F("id").asc()],
+            ),
+        )
+        .filter(position__lte=limit)
+        .order_by("id")
+    )
+
+    for comment in qs:
+        by_post[comment.post_id].comment_preview.append(comment)
+
+    return posts
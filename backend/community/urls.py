@@ -1,17 +1,37 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+
+def _read(view):
+    # The async twin of a read view when served by feed.asgi
+    return views.ASYNC_READS[view] if settings.ASYNC_READ_VIEWS else view
+
+
 urlpatterns = [
     path("auth/register/", views.register),
     path("auth/login/", views.login),
 
-    path("posts/", views.list_posts),
-    path("posts/<int:post_id>/", views.get_post),
+    path("posts/", _read(views.list_posts)),
+    path("posts/<int:post_id>/", _read(views.get_post)),
     path("posts/create/", views.create_post),
     path("posts/<int:post_id>/comments/", views.create_comment),
     path("posts/<int:post_id>/like/", views.like_post),
+    path("posts/<int:post_id>/unlike/", views.unlike_post),
+
+    path("feed/home/", views.home_feed),
+    path("users/<int:user_id>/follow/", views.follow_user),
+    path("users/<int:user_id>/unfollow/", views.unfollow_user),
+    path("users/<int:user_id>/karma/", views.user_karma),
 
     path("comments/<int:comment_id>/like/", views.like_comment),
+    path("comments/<int:comment_id>/unlike/", views.unlike_comment),
+    path("comments/<int:comment_id>/children/", views.comment_children),
+
+    path("likes/batch/", views.batch_likes),
+
+    path("search/", views.search_content),
+    path("events/", views.events_stream),
 
-    path("leaderboard/", views.leaderboard),
+    path("leaderboard/", _read(views.leaderboard)),
 ]
@@ -0,0 +1,87 @@
+from .models import Like
+
+
+def _payload_comments(payloads):
+    stack = [c for post in payloads for c in post.get("comments", ())]
+    while stack:
+        comment = stack.pop()
+        yield comment
+        stack.extend(comment.get("children", ()))
+
+
+def _payload_ids(payloads):
+    return (
+        {post["id"] for post in payloads},
+        {comment["id"] for comment in _payload_comments(payloads)},
+    )
+
+
+def _liked(user, field, ids):
+    # Ids among ``ids`` (post_id or comment_id) that ``user`` has liked
+    return (
+        Like.objects
+        .filter(user=user, **{f"{field}__in": ids})
+        .values_list(field, flat=True)
+    )
+
+
+class ViewerState:
+    """
+    The requesting user's likes over everything in one response.
+
+    Resolved with at most two ``IN`` queries (one for posts, one for
+    comments) and either merged into serialized payloads with ``apply`` or
+    handed to the serializers as ``viewer_state`` in their context, so
+    ``is_liked`` never queries per object.
+    """
+
+    def __init__(self, user, post_ids=(), comment_ids=()):
+        self.liked_posts = set()
+        self.liked_comments = set()
+        if user is None or not user.is_authenticated:
+            return
+
+        if post_ids:
+            self.liked_posts = set(_liked(user, "post_id", post_ids))
+        if comment_ids:
+            self.liked_comments = set(_liked(user, "comment_id", comment_ids))
+
+    @classmethod
+    async def aresolve(cls, user, post_ids=(), comment_ids=()):
+        """The same state for async views, through the async ORM."""
+        state = cls(None)
+        if user is None or not user.is_authenticated:
+            return state
+        if post_ids:
+            state.liked_posts = {
+                pk async for pk in _liked(user, "post_id", post_ids).aiterator()
+            }
+        if comment_ids:
+            state.liked_comments = {
+                pk async for pk in _liked(user, "comment_id", comment_ids).aiterator()
+            }
+        return state
+
+    @classmethod
+    def for_payloads(cls, user, payloads):
+        """Collect ids from already-serialized (e.g. cached) post payloads."""
+        return cls(user, *_payload_ids(payloads))
+
+    @classmethod
+    async def afor_payloads(cls, user, payloads):
+        return await cls.aresolve(user, *_payload_ids(payloads))
+
+    def apply(self, payloads):
+        """Merge ``is_liked`` into viewer-independent post payloads in place."""
+        for post in payloads:
+            post["is_liked"] = self.post_liked(post["id"])
+        for comment in _payload_comments(payloads):
+            comment["is_liked"] = self.comment_liked(comment["id"])
+        return payloads
+
+    def post_liked(self, post_id):
+        return post_id in self.liked_posts
+
+    def comment_liked(self, comment_id):
+        return comment_id in self.liked_comments
+
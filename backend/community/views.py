@@ -1,17 +1,73 @@
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    PermissionDenied,
+)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from django.contrib.auth.models import User
+from rest_framework.settings import api_settings
+from django.contrib.auth.models import AnonymousUser, User
 from django.contrib.auth import authenticate
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_safe
 from django.shortcuts import get_object_or_404
 from django.db import transaction, IntegrityError
+from django.db.models import F
 from django.utils import timezone
-from datetime import timedelta
-from django.db.models import Sum, Q
 
-from .models import Post, Comment, Like, KarmaTransaction
-from .serializers import PostSerializer
+from .cache import acached_leaderboard, cached_leaderboard, load_post_payloads
+from .conditional import make_etag, not_modified, set_validators
+from .events import (
+    FEED_CHANNEL,
+    get_broker,
+    post_channel,
+    publish_like_counts_on_commit,
+    publish_on_commit,
+)
+from .ingest import get_like_buffer
+from .instrumentation import timed
+from .karma import (
+    COMMENT_LIKE_POINTS,
+    KARMA_ORDERINGS,
+    LEADERBOARD_ORDERING,
+    POST_LIKE_POINTS,
+    award_karma,
+    karma_neighbours,
+    karma_rank,
+    leaderboard_rows,
+    ranked_users,
+)
+from .likes import KINDS, LikeEvent, apply_operations, apply_unlikes
+from .models import MAX_COMMENT_DEPTH, Post, Comment, Like, UserKarma
+from .pagination import PaginationError, akeyset_page, get_page_size, keyset_page
+from .ranking import HOT_ORDERING
+from .routing import replica_reads
+from .search import KINDS as SEARCH_KINDS, search
+from .serializers import CommentSerializer, PostSerializer, build_post_payloads
+from .streaming import (
+    async_stream_response,
+    json_stream_response,
+    stream_post_detail,
+    stream_posts,
+)
+from .timeline import fan_out, follow, home_page, unfollow
+from .viewer import ViewerState
+
+FEED_ORDERING = ("-created_at", "-id")
+# Siblings in the order of Comment.path, so slices continue a thread's tree
+CHILDREN_ORDERING = ("id",)
+FEED_SORTS = {"new": FEED_ORDERING, "hot": HOT_ORDERING}
 
 
 # =========================
@@ -66,16 +122,219 @@ def login(request):
 # =========================
 # POSTS
 # =========================
+def _int_param(request, name, default, minimum, maximum=None):
+    # request.GET: the same QueryDict on DRF and plain (async view) requests
+    raw = request.GET.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    # Clamped like page_size: larger values get the configured maximum
+    return value if maximum is None else min(value, maximum)
+
+
+def _tree_limits(request):
+    return (
+        _int_param(
+            request,
+            "max_depth",
+            settings.COMMENT_TREE_MAX_DEPTH,
+            0,
+            settings.COMMENT_TREE_MAX_DEPTH,
+        ),
+        _int_param(
+            request,
+            "max_children",
+            settings.COMMENT_TREE_MAX_CHILDREN,
+            1,
+            settings.COMMENT_TREE_MAX_CHILDREN,
+        ),
+    )
+
+
+def _tree_view(max_depth, max_children):
+    # Cache representation name for a (possibly limited) full tree
+    return f"full:{max_depth}:{max_children}"
+
+
+def _post_detail(request, post_id, version, max_depth=None, max_children=None):
+    payloads = load_post_payloads(
+        {post_id: version},
+        _tree_view(max_depth, max_children),
+        lambda ids: build_post_payloads(ids, "full", max_depth, max_children),
+    )
+    if not payloads:
+        raise Http404
+    return ViewerState.for_payloads(request.user, payloads).apply(payloads)[0]
+
+
+def _wants_stream(request):
+    return request.GET.get("stream", "").lower() in ("1", "true")
+
+
+@replica_reads
 @api_view(["GET"])
 def list_posts(request):
-    qs = Post.objects.select_related("author").order_by("-created_at")
-    return Response(PostSerializer(qs, many=True).data)
+    view = "summary" if request.query_params.get("view") == "summary" else "full"
+    try:
+        max_depth, max_children = _tree_limits(request)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    if "ids" in request.query_params:
+        return _posts_by_ids(request, view, max_depth, max_children)
+
+    sort = request.query_params.get("sort", "new")
+    if sort not in FEED_SORTS:
+        return Response(
+            {"detail": f"sort must be one of: {', '.join(FEED_SORTS)}"}, status=400
+        )
+    ordering = FEED_SORTS[sort]
+
+    if _wants_stream(request):
+        # Whole feed for exports: bounded memory, no paging
+        return json_stream_response(stream_posts(
+            Post.objects.order_by(*ordering),
+            request.user,
+            view,
+            settings.STREAM_CHUNK_SIZE,
+            max_depth,
+            max_children,
+        ))
+
+    try:
+        # Both orderings are served by an index (post_feed_idx, post_hot_idx)
+        posts, next_cursor = keyset_page(
+            Post.objects.only(
+                "id", "created_at", "hot_score", "version", "last_activity_at"
+            ),
+            ordering,
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+        )
+    except PaginationError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    return _post_list(
+        request,
+        {post.id: (post.version, post.last_activity_at) for post in posts},
+        view,
+        max_depth,
+        max_children,
+        next_cursor=next_cursor,
+    )
 
 
+def _posts_by_ids(request, view, max_depth, max_children):
+    # ?ids=3,1,2: those posts in that order, missing ones left out
+    try:
+        ids = [int(raw) for raw in request.query_params["ids"].split(",")]
+    except ValueError:
+        return Response(
+            {"detail": "ids must be a comma-separated list of integers"}, status=400
+        )
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.FEED_MAX_PAGE_SIZE:
+        return Response(
+            {"detail": f"at most {settings.FEED_MAX_PAGE_SIZE} ids"}, status=400
+        )
+
+    return _post_list(request, _post_state(ids), view, max_depth, max_children)
+
+
+def _post_state(ids):
+    # {post_id: (version, last_activity_at)} in the order of ``ids``
+    state = {
+        post_id: (version, last_activity_at)
+        for post_id, version, last_activity_at in Post.objects
+        .filter(id__in=ids)
+        .values_list("id", "version", "last_activity_at")
+    }
+    return {post_id: state[post_id] for post_id in ids if post_id in state}
+
+
+def _list_validators(request, state, view, max_depth, max_children, extra):
+    # (versions, cache view, ETag, Last-Modified) of one page of posts
+    versions = {post_id: version for post_id, (version, _) in state.items()}
+    cache_view = view if view == "summary" else _tree_view(max_depth, max_children)
+    etag = make_etag(request, cache_view, *extra.values(), *versions.items())
+    last_modified = max(
+        (last_activity_at for _, last_activity_at in state.values()),
+        default=timezone.now(),
+    )
+    return versions, cache_view, etag, last_modified
+
+
+def _post_list(request, state, view, max_depth, max_children, **extra):
+    """
+    ``{"results": [...], **extra}`` for ``state`` (``{post_id: (version,
+    last_activity_at)}``, in display order), answering 304 when the
+    request's validators still match.
+    """
+    versions, cache_view, etag, last_modified = _list_validators(
+        request, state, view, max_depth, max_children, extra
+    )
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    payloads = load_post_payloads(
+        versions,
+        cache_view,
+        lambda ids: build_post_payloads(ids, view, max_depth, max_children),
+    )
+    ViewerState.for_payloads(request.user, payloads).apply(payloads)
+
+    response = Response({"results": payloads, **extra})
+    return set_validators(response, etag, last_modified)
+
+
+@replica_reads
 @api_view(["GET"])
 def get_post(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    return Response(PostSerializer(post).data)
+    # Validators first: a 304 costs one indexed lookup and no serialization
+    state = (
+        Post.objects
+        .filter(id=post_id)
+        .values("version", "last_activity_at")
+        .first()
+    )
+    if state is None:
+        raise Http404
+
+    try:
+        max_depth, max_children = _tree_limits(request)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    stream = _wants_stream(request)
+    parts = [post_id, state["version"], max_depth, max_children]
+    if stream:
+        # A streamed body is a different representation from the buffered one
+        parts.append("stream")
+    etag = make_etag(request, *parts)
+    cached = not_modified(request, etag, state["last_activity_at"])
+    if cached is not None:
+        return cached
+
+    if stream:
+        response = json_stream_response(stream_post_detail(
+            post_id,
+            request.user,
+            settings.STREAM_CHUNK_SIZE,
+            max_depth,
+            max_children,
+        ))
+        return set_validators(response, etag, state["last_activity_at"])
+
+    response = Response(_post_detail(
+        request, post_id, state["version"], max_depth, max_children
+    ))
+    return set_validators(response, etag, state["last_activity_at"])
 
 
 @api_view(["POST"])
@@ -85,8 +344,67 @@ def create_post(request):
     if not content:
         return Response({"detail": "content required"}, status=400)
 
-    post = Post.objects.create(author=request.user, content=content)
-    return Response(PostSerializer(post).data, status=201)
+    with transaction.atomic():
+        post = Post.objects.create(author=request.user, content=content)
+        fan_out(post)
+        publish_on_commit(FEED_CHANNEL, {
+            "type": "post.created", "post_id": post.id, "author_id": post.author_id,
+        })
+    return Response(
+        PostSerializer(post, context={"request": request}).data, status=201
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def home_feed(request):
+    # Posts by the people the viewer follows (and their own), newest first
+    view = "summary" if request.query_params.get("view") == "summary" else "full"
+    try:
+        max_depth, max_children = _tree_limits(request)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    try:
+        post_ids, next_cursor = home_page(
+            request.user,
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+        )
+    except PaginationError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    return _post_list(
+        request,
+        _post_state(post_ids),
+        view,
+        max_depth,
+        max_children,
+        next_cursor=next_cursor,
+    )
+
+
+# =========================
+# FOLLOWS
+# =========================
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def follow_user(request, user_id):
+    followee = get_object_or_404(User, id=user_id)
+    if followee.id == request.user.id:
+        return Response({"detail": "Cannot follow yourself"}, status=400)
+    if not follow(request.user, followee):
+        return Response({"detail": "Already following"}, status=400)
+    return Response({"success": True})
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def unfollow_user(request, user_id):
+    followee = get_object_or_404(User, id=user_id)
+    if not unfollow(request.user, followee):
+        return Response({"detail": "Not following"}, status=400)
+    return Response({"success": True})
 
 
 # =========================
@@ -105,28 +423,125 @@ def create_comment(request, post_id):
     parent = None
     if parent_id:
         parent = get_object_or_404(Comment, id=parent_id, post=post)
-
-    Comment.objects.create(
-        post=post,
-        author=request.user,
-        parent=parent,
-        content=content
+        if parent.depth >= MAX_COMMENT_DEPTH:
+            # The reply's path would not fit
+            return Response(
+                {"detail": f"replies can be at most {MAX_COMMENT_DEPTH} levels deep"},
+                status=400,
+            )
+
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            post=post,
+            author=request.user,
+            parent=parent,
+            content=content
+        )
+        publish_on_commit(post_channel(post.id), {
+            "type": "comment.created",
+            "post_id": post.id,
+            "comment_id": comment.id,
+            "parent_id": comment.parent_id,
+        })
+        if parent is None:
+            Post.objects.filter(pk=post.pk).touch(
+                comment_count=F("comment_count") + 1,
+                reply_count=F("reply_count") + 1,
+            )
+        else:
+            Comment.objects.filter(pk=parent.pk).update(
+                reply_count=F("reply_count") + 1
+            )
+            Post.objects.filter(pk=post.pk).touch(
+                comment_count=F("comment_count") + 1
+            )
+
+    post.refresh_from_db(fields=["version"])
+    return Response(
+        _post_detail(
+            request,
+            post.id,
+            post.version,
+            settings.COMMENT_TREE_MAX_DEPTH,
+            settings.COMMENT_TREE_MAX_CHILDREN,
+        ),
+        status=201
     )
 
-    return Response(PostSerializer(post).data, status=201)
+
+@api_view(["GET"])
+def comment_children(request, comment_id):
+    # Next slice of one comment's replies, for expanding truncated trees
+    comment = get_object_or_404(Comment.objects.only("id", "post_id"), id=comment_id)
+    try:
+        children, next_cursor = keyset_page(
+            Comment.objects.select_related("author").filter(
+                post_id=comment.post_id, parent_id=comment.id
+            ),
+            CHILDREN_ORDERING,
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+        )
+    except PaginationError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    for child in children:
+        # Replies of replies are fetched on demand; has_more flags them
+        child.tree_children = []
+    viewer_state = ViewerState(
+        request.user, comment_ids=[child.id for child in children]
+    )
+    with timed("serialize"):
+        data = CommentSerializer(
+            children,
+            many=True,
+            context={"request": request, "viewer_state": viewer_state},
+        ).data
+    return Response({"results": data, "next_cursor": next_cursor})
 
 
 # =========================
 # LIKES
 # =========================
+def _drain_like_buffer():
+    # Unlikes and batches act on stored likes; write pending ones first
+    if settings.LIKE_INGEST_MODE == "buffered":
+        get_like_buffer().flush()
+
+
+def _unlike(event):
+    _drain_like_buffer()
+    if not apply_unlikes([event]):
+        return Response({"detail": "Not liked"}, status=400)
+    return Response({"success": True})
+
+
+def _queue_like(event):
+    # Buffered mode: the like is written by the ingest worker (202); it is
+    # "already liked" if it is stored or still waiting in the buffer
+    buffer = get_like_buffer()
+    stored = Like.objects.filter(
+        user_id=event.user_id, **{f"{event.kind}_id": event.target_id}
+    ).exists()
+    if stored or not buffer.submit(event):
+        return Response({"detail": "Already liked"}, status=400)
+    return Response({"success": True, "queued": True}, status=202)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def like_post(request, post_id):
     post = get_object_or_404(Post, id=post_id)
+    if settings.LIKE_INGEST_MODE == "buffered":
+        return _queue_like(LikeEvent(request.user.id, "post", post.id))
     try:
         with transaction.atomic():
             Like.objects.create(user=request.user, post=post)
-            KarmaTransaction.objects.create(user=post.author, points=5)
+            Post.objects.filter(pk=post.pk).touch(
+                like_count=F("like_count") + 1
+            )
+            award_karma(post.author, POST_LIKE_POINTS)
+            publish_like_counts_on_commit(post_ids=[post.id])
     except IntegrityError:
         return Response({"detail": "Already liked"}, status=400)
 
@@ -137,44 +552,467 @@ def like_post(request, post_id):
 @permission_classes([IsAuthenticated])
 def like_comment(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
+    if settings.LIKE_INGEST_MODE == "buffered":
+        return _queue_like(LikeEvent(request.user.id, "comment", comment.id))
     try:
         with transaction.atomic():
             Like.objects.create(user=request.user, comment=comment)
-            KarmaTransaction.objects.create(user=comment.author, points=1)
+            Comment.objects.filter(pk=comment.pk).update(
+                like_count=F("like_count") + 1
+            )
+            Post.objects.filter(pk=comment.post_id).touch()
+            award_karma(comment.author, COMMENT_LIKE_POINTS)
+            publish_like_counts_on_commit(comment_posts={comment.id: comment.post_id})
     except IntegrityError:
         return Response({"detail": "Already liked"}, status=400)
 
     return Response({"success": True})
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def unlike_post(request, post_id):
+    post = get_object_or_404(Post.objects.only("id"), id=post_id)
+    return _unlike(LikeEvent(request.user.id, "post", post.id))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def unlike_comment(request, comment_id):
+    comment = get_object_or_404(Comment.objects.only("id"), id=comment_id)
+    return _unlike(LikeEvent(request.user.id, "comment", comment.id))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def batch_likes(request):
+    """
+    ``{"operations": [{"op": "like"|"unlike", "type": "post"|"comment",
+    "id": N}, ...]}``, applied in order in one transaction. Each result
+    echoes its operation with a status: liked, already_liked, unliked,
+    not_liked, not_found or invalid.
+    """
+    operations = request.data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return Response({"detail": "operations must be a non-empty list"}, status=400)
+    if len(operations) > settings.LIKE_BATCH_MAX_OPERATIONS:
+        return Response(
+            {"detail": f"at most {settings.LIKE_BATCH_MAX_OPERATIONS} operations"},
+            status=400,
+        )
+
+    results = []
+    valid = []
+    for item in operations:
+        if not isinstance(item, dict):
+            item = {}
+        result = {key: item.get(key) for key in ("op", "type", "id")}
+        results.append(result)
+        if (
+            result["op"] in ("like", "unlike")
+            and result["type"] in KINDS
+            and isinstance(result["id"], int)
+            and not isinstance(result["id"], bool)
+        ):
+            event = LikeEvent(request.user.id, result["type"], result["id"])
+            valid.append((result, (result["op"], event)))
+        else:
+            result["status"] = "invalid"
+
+    _drain_like_buffer()
+    statuses = apply_operations([operation for _, operation in valid])
+    for (result, _), status in zip(valid, statuses):
+        result["status"] = status
+
+    return Response({"results": results})
+
+
+# =========================
+# LIVE EVENTS (ASGI)
+# =========================
+def _sse(event):
+    return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
+@require_GET
+async def events_stream(request):
+    """
+    Server-Sent Events: new posts, plus new comments and like counts of the
+    posts in ``?posts=1,2,3``. Each idle client is one queue and one
+    suspended coroutine, not a thread, when served by feed.asgi.
+    """
+    try:
+        post_ids = [
+            int(raw) for raw in request.GET.get("posts", "").split(",") if raw
+        ]
+    except ValueError:
+        return JsonResponse(
+            {"detail": "posts must be a comma-separated list of integers"}, status=400
+        )
+    if len(post_ids) > settings.EVENTS_MAX_POSTS:
+        return JsonResponse(
+            {"detail": f"at most {settings.EVENTS_MAX_POSTS} posts"}, status=400
+        )
+
+    channels = [FEED_CHANNEL, *(post_channel(pk) for pk in dict.fromkeys(post_ids))]
+
+    async def stream():
+        # Subscribed once the server starts streaming, on its event loop
+        subscription = get_broker().subscribe(channels)
+        try:
+            # Reconnect after this many ms; refetch, as missed events are gone
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), settings.EVENTS_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing the idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            # Client gone (the ASGI handler cancels us) or server shutdown
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# =========================
+# SEARCH
+# =========================
+@replica_reads
+@api_view(["GET"])
+def search_content(request):
+    # ?q=words&type=post|comment, best matches first
+    kind = request.query_params.get("type")
+    if kind is not None and kind not in SEARCH_KINDS:
+        return Response(
+            {"detail": f"type must be one of: {', '.join(SEARCH_KINDS)}"}, status=400
+        )
+    try:
+        results, next_cursor = search(
+            request.query_params.get("q", ""),
+            kinds=(kind,) if kind else SEARCH_KINDS,
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+        )
+    except ValueError as exc:
+        # PaginationError included
+        return Response({"detail": str(exc)}, status=400)
+    return Response({"results": results, "next_cursor": next_cursor})
+
+
 # =========================
 # LEADERBOARD (24H)
 # =========================
+@replica_reads
 @api_view(["GET"])
 def leaderboard(request):
-    since = timezone.now() - timedelta(hours=24)
+    # The cached top 5 by default; ?cursor= / ?page_size= page through everyone
+    if _wants_page(request):
+        try:
+            users, next_cursor = keyset_page(
+                ranked_users(),
+                LEADERBOARD_ORDERING,
+                cursor=request.query_params.get("cursor"),
+                page_size=get_page_size(request),
+            )
+        except PaginationError as exc:
+            return Response({"detail": str(exc)}, status=400)
+        return Response({
+            "results": [_leaderboard_entry(karma) for karma in users],
+            "next_cursor": next_cursor,
+        })
+
+    def build():
+        return [_leaderboard_entry(karma) for karma in leaderboard_rows()]
+
+    return Response(cached_leaderboard(build))
+
+
+def _wants_page(request):
+    return "cursor" in request.GET or "page_size" in request.GET
+
+
+def _leaderboard_entry(karma):
+    # 🔥 Shape data properly for frontend
+    return {
+        "id": karma.user_id,
+        "username": karma.user.username,
+        "karma_24h": karma.karma_24h,
+        "post_likes": karma.post_karma_24h,
+        "comment_likes": karma.comment_karma_24h,
+    }
+
+
+@replica_reads
+@api_view(["GET"])
+def user_karma(request, user_id):
+    # ?window=24h|lifetime ranks by that total; ?neighbours=N users either side
+    window = request.query_params.get("window", "24h")
+    if window not in KARMA_ORDERINGS:
+        return Response(
+            {"detail": f"window must be one of: {', '.join(KARMA_ORDERINGS)}"},
+            status=400,
+        )
+    try:
+        count = _int_param(request, "neighbours", 2, 0, settings.KARMA_MAX_NEIGHBOURS)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=400)
+
+    user = get_object_or_404(User.objects.select_related("karma"), id=user_id)
+    try:
+        karma = user.karma
+        rank = karma_rank(karma, window)
+        above, below = karma_neighbours(karma, window, count)
+    except UserKarma.DoesNotExist:
+        # Never had karma: zero totals, and no rank among stored rows
+        karma, rank, above, below = UserKarma(user=user), None, [], []
+    return Response({
+        "id": user.id,
+        "username": user.username,
+        "lifetime": karma.lifetime,
+        "karma_24h": karma.karma_24h,
+        "post_likes": karma.post_karma_24h,
+        "comment_likes": karma.comment_karma_24h,
+        "window": window,
+        "rank": rank,
+        "above": [
+            _karma_neighbour(neighbour, rank - len(above) + i)
+            for i, neighbour in enumerate(above)
+        ],
+        "below": [
+            _karma_neighbour(neighbour, rank + 1 + i)
+            for i, neighbour in enumerate(below)
+        ],
+    })
 
-    qs = (
-        KarmaTransaction.objects
-        .filter(created_at__gte=since)
-        .values("user__id", "user__username")
-        .annotate(
-            karma_24h=Sum("points"),
-            post_likes=Sum("points", filter=Q(points=5)),
-            comment_likes=Sum("points", filter=Q(points=1)),
+
+def _karma_neighbour(karma, rank):
+    return {
+        "rank": rank,
+        "id": karma.user_id,
+        "username": karma.user.username,
+        "lifetime": karma.lifetime,
+        "karma_24h": karma.karma_24h,
+    }
+
+
+# =========================
+# ASYNC READS (ASGI)
+# =========================
+def _json_response(data, status=200, headers=None):
+    # The bytes DRF's JSONRenderer gives the sync views
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def _async_authenticators():
+    # DEFAULT_AUTHENTICATION_CLASSES, each of which needs an async path: a
+    # sync authenticate() would query from the event loop
+    classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    sync_only = [cls.__name__ for cls in classes if not hasattr(cls, "aauthenticate")]
+    if sync_only:
+        raise ImproperlyConfigured(
+            f"{', '.join(sync_only)} cannot authenticate async views: add an "
+            "aauthenticate() or turn ASYNC_READ_VIEWS off"
         )
-        .order_by("-karma_24h")[:5]
+    return [cls() for cls in classes]
+
+
+def _denied(request, exc, authenticators):
+    # DRF's response to a failed authentication or permission check: 401
+    # with the first authenticator's challenge, or 403 when there is none
+    status, headers = exc.status_code, None
+    if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+        challenge = authenticators[0].authenticate_header(request) if authenticators else None
+        if challenge:
+            headers = {"WWW-Authenticate": challenge}
+        else:
+            status = 403
+    return _json_response({"detail": exc.detail}, status, headers)
+
+
+def _async_read(view):
+    """
+    Run an async read view the way ``@api_view(["GET"])`` runs its sync
+    twin: GET/HEAD only, ``request.user``/``request.auth`` from
+    DEFAULT_AUTHENTICATION_CLASSES (through their ``aauthenticate``),
+    DEFAULT_PERMISSION_CLASSES checked, and DRF-shaped 401/403/404
+    responses. Nothing here calls DRF, which has no async views.
+    """
+    @require_safe
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticators = _async_authenticators()
+        # Replaces the lazy session user, which would query synchronously
+        request.user, request.auth = AnonymousUser(), None
+        try:
+            authenticated = None
+            for authenticator in authenticators:
+                authenticated = await authenticator.aauthenticate(request)
+                if authenticated is not None:
+                    request.user, request.auth = authenticated
+                    break
+            for permission in api_settings.DEFAULT_PERMISSION_CLASSES:
+                # Permission checks read request.user, not the database
+                if not permission().has_permission(request, wrapper):
+                    if authenticators and authenticated is None:
+                        raise NotAuthenticated()
+                    raise PermissionDenied(getattr(permission, "message", None))
+        except APIException as exc:
+            return _denied(request, exc, authenticators)
+        try:
+            return await view(request, *args, **kwargs)
+        except Http404:
+            return _json_response({"detail": "Not found."}, 404)
+
+    return wrapper
+
+
+async def _apost_list(request, state, view, max_depth, max_children, **extra):
+    # _post_list with the viewer's likes read through the async ORM
+    versions, cache_view, etag, last_modified = _list_validators(
+        request, state, view, max_depth, max_children, extra
     )
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    # Cache misses are serialized by the sync builders, in a worker thread
+    payloads = await sync_to_async(load_post_payloads)(
+        versions,
+        cache_view,
+        lambda ids: build_post_payloads(ids, view, max_depth, max_children),
+    )
+    viewer = await ViewerState.afor_payloads(request.user, payloads)
+    response = _json_response({"results": viewer.apply(payloads), **extra})
+    return set_validators(response, etag, last_modified)
 
-    # 🔥 Shape data properly for frontend
-    result = []
-    for row in qs:
-        result.append({
-            "id": row["user__id"],
-            "username": row["user__username"],
-            "karma_24h": row["karma_24h"] or 0,
-            "post_likes": row["post_likes"] or 0,
-            "comment_likes": row["comment_likes"] or 0,
+
+@replica_reads
+@_async_read
+async def list_posts_async(request):
+    """``list_posts`` for the ASGI server; same parameters and responses."""
+    if "ids" in request.GET or _wants_stream(request):
+        # Not on the hot path: the sync view answers these in a thread
+        return async_stream_response(await sync_to_async(list_posts)(request))
+
+    view = "summary" if request.GET.get("view") == "summary" else "full"
+    try:
+        max_depth, max_children = _tree_limits(request)
+    except ValueError as exc:
+        return _json_response({"detail": str(exc)}, 400)
+
+    sort = request.GET.get("sort", "new")
+    if sort not in FEED_SORTS:
+        return _json_response(
+            {"detail": f"sort must be one of: {', '.join(FEED_SORTS)}"}, 400
+        )
+
+    try:
+        posts, next_cursor = await akeyset_page(
+            Post.objects.only(
+                "id", "created_at", "hot_score", "version", "last_activity_at"
+            ),
+            FEED_SORTS[sort],
+            cursor=request.GET.get("cursor"),
+            page_size=get_page_size(request),
+        )
+    except PaginationError as exc:
+        return _json_response({"detail": str(exc)}, 400)
+
+    return await _apost_list(
+        request,
+        {post.id: (post.version, post.last_activity_at) for post in posts},
+        view,
+        max_depth,
+        max_children,
+        next_cursor=next_cursor,
+    )
+
+
+@replica_reads
+@_async_read
+async def get_post_async(request, post_id):
+    """``get_post`` for the ASGI server; same parameters and responses."""
+    if _wants_stream(request):
+        return async_stream_response(
+            await sync_to_async(get_post)(request, post_id)
+        )
+
+    state = await (
+        Post.objects
+        .filter(id=post_id)
+        .values("version", "last_activity_at")
+        .afirst()
+    )
+    if state is None:
+        raise Http404
+
+    try:
+        max_depth, max_children = _tree_limits(request)
+    except ValueError as exc:
+        return _json_response({"detail": str(exc)}, 400)
+
+    etag = make_etag(request, post_id, state["version"], max_depth, max_children)
+    cached = not_modified(request, etag, state["last_activity_at"])
+    if cached is not None:
+        return cached
+
+    payloads = await sync_to_async(load_post_payloads)(
+        {post_id: state["version"]},
+        _tree_view(max_depth, max_children),
+        lambda ids: build_post_payloads(ids, "full", max_depth, max_children),
+    )
+    if not payloads:
+        raise Http404
+    viewer = await ViewerState.afor_payloads(request.user, payloads)
+    response = _json_response(viewer.apply(payloads)[0])
+    return set_validators(response, etag, state["last_activity_at"])
+
+
+@replica_reads
+@_async_read
+async def leaderboard_async(request):
+    """``leaderboard`` for the ASGI server."""
+    if _wants_page(request):
+        try:
+            users, next_cursor = await akeyset_page(
+                ranked_users(),
+                LEADERBOARD_ORDERING,
+                cursor=request.GET.get("cursor"),
+                page_size=get_page_size(request),
+            )
+        except PaginationError as exc:
+            return _json_response({"detail": str(exc)}, 400)
+        return _json_response({
+            "results": [_leaderboard_entry(karma) for karma in users],
+            "next_cursor": next_cursor,
         })
 
-    return Response(result)
+    async def build():
+        return [
+            _leaderboard_entry(karma) async for karma in leaderboard_rows().aiterator()
+        ]
+
+    return _json_response(await acached_leaderboard(build))
+
+
+# Sync read views and their async twins; community/urls.py routes to the
+# twins when ASYNC_READ_VIEWS is on
+ASYNC_READS = {
+    list_posts: list_posts_async,
+    get_post: get_post_async,
+    leaderboard: leaderboard_async,
+}
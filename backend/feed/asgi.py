@@ -0,0 +1,12 @@
+"""
+ASGI entry point. Serves the whole API like feed.wsgi, and is required
+for /api/events/: each streaming client is then a suspended coroutine
+instead of a blocked worker thread.
+
+    uvicorn feed.asgi:application --workers 3
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "feed.settings")
+application = get_asgi_application()
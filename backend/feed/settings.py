@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from .database import database_from_env, replicas_from_env, sqlite_pragmas
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get(
@@ -29,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "community.instrumentation.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -36,6 +40,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "community.routing.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -59,13 +64,22 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "feed.wsgi.application"
-
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
+# Live events (/api/events/) need the ASGI entry point
+ASGI_APPLICATION = "feed.asgi.application"
+
+# DATABASE_URL (postgres://... or sqlite:///...) and tuning knobs; see
+# feed/database.py. Defaults to the bundled db.sqlite3 in WAL mode.
+DATABASES = {"default": database_from_env(BASE_DIR)}
+SQLITE_PRAGMAS = sqlite_pragmas()
+
+# Read replicas (DATABASE_REPLICA_URLS). Views marked @replica_reads
+# (feed, post detail, leaderboard) read from them; a client that just wrote
+# is pinned to the primary for REPLICA_PIN_SECONDS. Pins live in the
+# default cache, so use a shared CACHE_BACKEND with several workers.
+DATABASES.update(replicas_from_env(BASE_DIR))
+READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["community.routing.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", "5"))
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -81,11 +95,114 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Per-request query count and timings (Server-Timing header and one JSON
+# line per request on the community.requests logger); requests running
+# more queries than QUERY_BUDGET_WARN are logged as warnings
+QUERY_BUDGET_WARN = int(os.environ.get("QUERY_BUDGET_WARN", "30"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "community.requests": {
+            "handlers": ["console"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+# Token -> user lookups cached per process (CachedTokenAuthentication)
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", "60"))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "community.authentication.CachedTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
 }
+
+# Feed pagination (keyset on created_at, id)
+FEED_PAGE_SIZE = int(os.environ.get("FEED_PAGE_SIZE", "20"))
+FEED_MAX_PAGE_SIZE = int(os.environ.get("FEED_MAX_PAGE_SIZE", "100"))
+FEED_SUMMARY_COMMENTS = int(os.environ.get("FEED_SUMMARY_COMMENTS", "3"))
+
+# Cache backend for serialized posts and the leaderboard. Defaults to
+# local memory; point CACHE_BACKEND at e.g.
+# django.core.cache.backends.filebased.FileBasedCache with a directory
+# in CACHE_LOCATION to share entries between worker processes.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "community-feed"),
+    }
+}
+
+FEED_CACHE_TIMEOUT = int(os.environ.get("FEED_CACHE_TIMEOUT", "300"))
+LEADERBOARD_CACHE_TIMEOUT = int(os.environ.get("LEADERBOARD_CACHE_TIMEOUT", "30"))
+
+# Serialize read-only post payloads from .values() rows instead of DRF
+# serializers (same JSON output)
+FEED_FAST_SERIALIZER = os.environ.get("FEED_FAST_SERIALIZER", "True").lower() == "true"
+
+# Live events (community/events.py): the pub/sub backend, events buffered
+# per slow client before it is told to resync, seconds between keep-alive
+# comments, reconnect delay sent to clients, posts one client may watch
+EVENTS_BACKEND = os.environ.get("EVENTS_BACKEND", "community.events.LocalBroker")
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT = float(os.environ.get("EVENTS_HEARTBEAT", "15"))
+EVENTS_RETRY_MS = int(os.environ.get("EVENTS_RETRY_MS", "3000"))
+EVENTS_MAX_POSTS = int(os.environ.get("EVENTS_MAX_POSTS", "100"))
+
+# Serve the feed, post detail and leaderboard with their async views
+# (community.views.ASYNC_READS); for the ASGI server. Under WSGI each async
+# request would pay for its own event loop, so turn it off there.
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "True").lower() == "true"
+
+# Full-text search ranks at most this many of the newest matches of each
+# kind (posts, comments), so very common words cost a bounded scan
+SEARCH_MAX_CANDIDATES = int(os.environ.get("SEARCH_MAX_CANDIDATES", "5000"))
+
+# Posts (feed) or comments (thread) serialized per chunk with ?stream=1
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "200"))
+
+# Limits for comment trees on post detail and the full feed view; clients
+# can ask for less with ?max_depth= / ?max_children=, never for more
+# (?stream=1 included)
+COMMENT_TREE_MAX_DEPTH = int(os.environ.get("COMMENT_TREE_MAX_DEPTH", "8"))
+COMMENT_TREE_MAX_CHILDREN = int(os.environ.get("COMMENT_TREE_MAX_CHILDREN", "50"))
+
+# Home timelines (community/timeline.py): authors with more followers
+# than this are merged in on read instead of fanned out on write
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.environ.get("TIMELINE_FANOUT_MAX_FOLLOWERS", "5000"))
+# Newest entries kept per timeline by the trim_timelines command
+TIMELINE_MAX_ENTRIES = int(os.environ.get("TIMELINE_MAX_ENTRIES", "800"))
+# Posts copied into a timeline when its owner follows someone
+TIMELINE_BACKFILL = int(os.environ.get("TIMELINE_BACKFILL", "20"))
+
+# Karma ledger rows older than this many days are folded into daily
+# summaries by the compact_karma_ledger command
+KARMA_LEDGER_RETENTION_DAYS = int(os.environ.get("KARMA_LEDGER_RETENTION_DAYS", "30"))
+
+# Like ingestion: "sync" writes each like in its request; "buffered" queues
+# likes in-process and writes them in batches from a background thread
+# (see community/ingest.py). LIKE_SPOOL_PATH makes the queue durable; each
+# process spools to that path plus its pid.
+LIKE_INGEST_MODE = os.environ.get("LIKE_INGEST_MODE", "sync")
+LIKE_FLUSH_INTERVAL = float(os.environ.get("LIKE_FLUSH_INTERVAL", "0.5"))
+LIKE_FLUSH_BATCH = int(os.environ.get("LIKE_FLUSH_BATCH", "500"))
+LIKE_SPOOL_PATH = os.environ.get("LIKE_SPOOL_PATH") or None
+# Upper bound on operations per POST /api/likes/batch/
+LIKE_BATCH_MAX_OPERATIONS = int(os.environ.get("LIKE_BATCH_MAX_OPERATIONS", "200"))
+
+# Most users users/<id>/karma/ lists on either side of a user's rank
+KARMA_MAX_NEIGHBOURS = int(os.environ.get("KARMA_MAX_NEIGHBOURS", "10"))
@@ -16,7 +16,7 @@ export default function Feed() {
   const load = async () => {
     try {
       const res = await api.get("posts/");
-      setPosts(res.data);
+      setPosts(res.data.results);
     } catch (error) {
       console.error("Failed to load posts:", error);
     } finally {